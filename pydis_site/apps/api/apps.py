@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from prometheus_client import REGISTRY
 
 
 class ApiConfig(AppConfig):
@@ -13,3 +14,6 @@ class ApiConfig(AppConfig):
         https://docs.djangoproject.com/en/3.2/ref/applications/#django.apps.AppConfig.ready
         """
         import pydis_site.apps.api.signals  # noqa: F401
+        from pydis_site.apps.api.metrics import DatabasePoolCollector
+
+        REGISTRY.register(DatabasePoolCollector())
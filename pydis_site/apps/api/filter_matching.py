@@ -0,0 +1,87 @@
+"""Matching of text against the contents of the token and domain filters."""
+import contextlib
+import functools
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+
+from pydis_site.apps.api.models.bot.filters import Filter, FilterList
+
+# Names of the filter lists whose filters are matched. The contents of the filters of
+# all but the domain list are regular expressions.
+DOMAIN_LIST = "domain"
+MATCHED_LISTS = ("token", DOMAIN_LIST)
+
+# Finds the host of each URL in a message, like the bot does when looking for domains.
+# The user info before an `@` is skipped, since the host only follows it.
+URL_HOST_RE = re.compile(r"https?://(?:[^\s/?#@\\]*@)?([^\s/?#:@\\]+)", flags=re.IGNORECASE)
+
+# Backreferences refer to the wrong group once a pattern is combined with others.
+BACKREFERENCE_RE = re.compile(r"\\\d|\(\?P=")
+
+
+class FilterMatcher:
+    """
+    Compiled matchers for the contents of all token and domain filters.
+
+    Token filters are regular expressions, searched for case-insensitively. All of them
+    are first combined into a single pattern, so that messages which match none of them
+    are rejected with one search. Domain filters match URLs whose host is the filter's
+    domain or one of its subdomains, looked up per label of the host.
+    """
+
+    def __init__(self, filters: Iterable[dict]):
+        self.tokens = []
+        self.domains = defaultdict(list)
+
+        combinable = []
+        for filter_ in filters:
+            result = {key: filter_[key] for key in ("id", "filter_list", "content")}
+            if filter_["filter_list__name"] == DOMAIN_LIST:
+                self.domains[filter_["content"].lower().strip(".")].append(result)
+                continue
+
+            try:
+                pattern = re.compile(filter_["content"], flags=re.IGNORECASE)
+            except re.error:
+                # The bot can't use this filter either.
+                continue
+            self.tokens.append((pattern, result))
+            if not BACKREFERENCE_RE.search(filter_["content"]):
+                combinable.append(filter_["content"])
+
+        self.combined_tokens = None
+        if len(combinable) == len(self.tokens) and self.tokens:
+            # This fails for example if a group name is used by more than one filter.
+            with contextlib.suppress(re.error):
+                self.combined_tokens = re.compile(
+                    "|".join(f"(?:{content})" for content in combinable), flags=re.IGNORECASE
+                )
+
+    def match(self, text: str) -> list[dict]:
+        """Return the filters matching the given text, ordered by ID."""
+        matches = []
+        if self.combined_tokens is None or self.combined_tokens.search(text):
+            matches.extend(result for pattern, result in self.tokens if pattern.search(text))
+
+        for host in {host.lower().rstrip(".") for host in URL_HOST_RE.findall(text)}:
+            labels = host.split(".")
+            for start in range(len(labels)):
+                matches.extend(self.domains.get(".".join(labels[start:]), ()))
+
+        unique_matches = {result["id"]: result for result in matches}
+        return [unique_matches[id_] for id_ in sorted(unique_matches)]
+
+
+def get_matcher() -> FilterMatcher:
+    """Return the matcher for the current filters, rebuilding it if any filter has changed."""
+    return _build_matcher(FilterList.get_version())
+
+
+@functools.lru_cache(maxsize=1)
+def _build_matcher(version: tuple) -> FilterMatcher:
+    """Build the matcher for the filters as of the given version."""
+    filters = Filter.objects.filter(
+        filter_list__name__in=MATCHED_LISTS
+    ).values("id", "filter_list", "content", "filter_list__name")
+    return FilterMatcher(filters)
@@ -0,0 +1,74 @@
+import time
+from collections.abc import Callable
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import Max
+
+from pydis_site.apps.api.models import User
+from pydis_site.apps.api.serializers import UserListSerializer
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the two ways of bulk updating users used by `/bot/users/bulk_patch`.
+
+    All users created and updated by the benchmark are rolled back afterwards.
+    """
+
+    help = (
+        "Compare bulk patching users in memory with staging the updates via COPY, "
+        "for the given numbers of users."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the numbers of users to benchmark with."""
+        parser.add_argument(
+            "sizes",
+            nargs="*",
+            type=int,
+            default=[1_000, 10_000, 100_000],
+            help="Numbers of users to update at once.",
+        )
+
+    def handle(self, *args, sizes: list[int], **options) -> None:
+        """Time both update paths for each of the given sizes."""
+        self.stdout.write(f"{'users':>10} {'in memory':>12} {'copy':>12}")
+        for size in sizes:
+            in_memory = self.time_update(size, self.update_in_memory)
+            via_copy = self.time_update(size, UserListSerializer.update_via_copy)
+            self.stdout.write(f"{size:>10} {in_memory:>11.3f}s {via_copy:>11.3f}s")
+
+    @staticmethod
+    def update_in_memory(validated_data: list) -> list:
+        """Update the users like bulk patches below `UserListSerializer.COPY_THRESHOLD`."""
+        return UserListSerializer.update_in_memory(
+            User.objects.all(),
+            validated_data,
+            {data["id"] for data in validated_data},
+        )
+
+    @staticmethod
+    def time_update(size: int, update: Callable[[list], list]) -> float:
+        """Return the time `update` takes to update `size` freshly created users."""
+        with transaction.atomic():
+            first_id = (User.objects.aggregate(Max("id"))["id__max"] or 0) + 1
+            User.objects.bulk_create(
+                (
+                    User(id=user_id, name=f"Benchmark user {user_id}", discriminator=1)
+                    for user_id in range(first_id, first_id + size)
+                ),
+                batch_size=5000,
+            )
+            validated_data = [
+                {"id": user_id, "roles": [user_id % 10], "in_guild": user_id % 2 == 0}
+                for user_id in range(first_id, first_id + size)
+            ]
+
+            start = time.perf_counter()
+            update(validated_data)
+            elapsed = time.perf_counter() - start
+
+            transaction.set_rollback(True)
+
+        return elapsed
@@ -0,0 +1,82 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from pydis_site.apps.api.models import MetricityActivity, MetricityActivityCheckpoint
+from pydis_site.apps.api.models.bot.metricity import Metricity
+
+# How far behind the current time to stop rolling up. Rolled up messages keep counting
+# even if they are deleted later, so this leaves time for spam to be deleted before it is
+# rolled up. More recent messages are queried live, which excludes deleted ones.
+ROLLUP_LAG = datetime.timedelta(days=7)
+# Key of the advisory lock which keeps roll ups from running concurrently.
+ROLLUP_LOCK_ID = 0x726f6c6c7570  # "rollup"
+
+
+class Command(BaseCommand):
+    """
+    Roll up metricity message activity into per-user totals.
+
+    This is meant to be run periodically. Runs which overlap with a previous one do nothing.
+    """
+
+    help = (
+        "Roll up the message activity of all users from metricity, "
+        "processing only the messages created since the last run."
+    )
+
+    def handle(self, *args, **options) -> None:
+        """Roll up all messages created between the last run and now."""
+        with transaction.atomic():
+            if not self.lock():
+                self.stdout.write("Another roll up is in progress.")
+                return
+
+            self.rollup()
+
+    @staticmethod
+    def lock() -> bool:
+        """
+        Try to take the lock held by roll ups until the end of the transaction.
+
+        Overlapping roll ups would both add the activity after the same checkpoint.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [ROLLUP_LOCK_ID])
+            locked, = cursor.fetchone()
+        return locked
+
+    def rollup(self) -> None:
+        """Roll up the messages since the checkpoint, while holding the lock."""
+        checkpoint = MetricityActivityCheckpoint.get()
+        since = checkpoint.processed_until if checkpoint else None
+        until = timezone.now() - ROLLUP_LAG
+        if since is not None and since >= until:
+            self.stdout.write(f"Activity is already rolled up to {since.isoformat()}.")
+            return
+
+        with Metricity() as metricity:
+            activity = metricity.message_activity(since, until)
+
+        rollups = MetricityActivity.objects.in_bulk(
+            [int(user_id) for user_id, *_ in activity]
+        )
+        for user_id, *counts in activity:
+            rollup = rollups.setdefault(int(user_id), MetricityActivity(user_id=int(user_id)))
+            rollup.add(*counts)
+
+        MetricityActivity.objects.bulk_create(
+            rollups.values(),
+            batch_size=5000,
+            update_conflicts=True,
+            unique_fields=('user_id',),
+            update_fields=('total_messages', 'activity_blocks', 'last_block'),
+        )
+        if checkpoint is None:
+            checkpoint = MetricityActivityCheckpoint(processed_until=until)
+        checkpoint.processed_until = until
+        checkpoint.save()
+
+        self.stdout.write(f"Rolled up activity of {len(activity)} users up to {until.isoformat()}.")
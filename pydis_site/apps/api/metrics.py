@@ -0,0 +1,53 @@
+from collections.abc import Iterator
+
+from django.db import connections
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+# Pool metrics, as (metric family, name, documentation, statistic key) tuples.
+POOL_METRICS = (
+    (GaugeMetricFamily, "django_db_pool_size",
+     "Number of connections currently managed by the pool.", "pool_size"),
+    (GaugeMetricFamily, "django_db_pool_max_size",
+     "Maximum number of connections the pool may hold.", "pool_max"),
+    (GaugeMetricFamily, "django_db_pool_available",
+     "Number of idle connections in the pool.", "pool_available"),
+    (GaugeMetricFamily, "django_db_pool_requests_waiting",
+     "Number of requests currently waiting for a connection.", "requests_waiting"),
+    (CounterMetricFamily, "django_db_pool_requests",
+     "Number of connections checked out of the pool.", "requests_num"),
+    (CounterMetricFamily, "django_db_pool_requests_queued",
+     "Number of checkouts that had to wait for a connection to become available.", "requests_queued"),
+    (CounterMetricFamily, "django_db_pool_requests_wait_seconds",
+     "Total time spent waiting to check out a connection.", "requests_wait_ms"),
+    (CounterMetricFamily, "django_db_pool_requests_errors",
+     "Number of checkouts that timed out or failed.", "requests_errors"),
+)
+
+
+class DatabasePoolCollector(Collector):
+    """Export the statistics of the connection pools of all configured databases to Prometheus."""
+
+    def describe(self) -> Iterator[Metric]:
+        """
+        Describe the exported metrics without collecting them.
+
+        Without this, registering the collector would collect metrics, which creates the
+        connection pools before the test runner had a chance to switch to the test databases.
+        """
+        for family, name, documentation, _key in POOL_METRICS:
+            yield family(name, documentation, labels=["alias"])
+
+    def collect(self) -> Iterator[Metric]:
+        """Collect the current pool statistics, labelled by database alias."""
+        pools = {alias: getattr(connections[alias], "pool", None) for alias in connections}
+        stats = {alias: pool.get_stats() for alias, pool in pools.items() if pool is not None}
+
+        for family, name, documentation, key in POOL_METRICS:
+            metric = family(name, documentation, labels=["alias"])
+            for alias, pool_stats in stats.items():
+                value = pool_stats.get(key, 0)
+                if key == "requests_wait_ms":
+                    value /= 1000
+                metric.add_metric([alias], value)
+            yield metric
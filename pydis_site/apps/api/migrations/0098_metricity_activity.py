@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-18 04:32
+
+import pydis_site.apps.api.models.mixins
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0097_image_hash_filter_list'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricityActivity',
+            fields=[
+                ('user_id', models.BigIntegerField(help_text='The ID of the user, taken from Discord. The user may be unknown to the site.', primary_key=True, serialize=False, verbose_name='User ID')),
+                ('total_messages', models.PositiveIntegerField(default=0, help_text="The number of messages counted towards the user's activity.")),
+                ('activity_blocks', models.PositiveIntegerField(default=0, help_text='The number of distinct 10 minute blocks in which the user has sent messages.')),
+                ('last_block', models.BigIntegerField(help_text='The most recent block counted in `activity_blocks`, used to avoid counting it twice.', null=True)),
+            ],
+            bases=(pydis_site.apps.api.models.mixins.ModelReprMixin, models.Model),
+        ),
+        migrations.CreateModel(
+            name='MetricityActivityCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('processed_until', models.DateTimeField(help_text='Messages created up to and including this time have been rolled up.')),
+            ],
+            bases=(pydis_site.apps.api.models.mixins.ModelReprMixin, models.Model),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0099_user_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='infraction',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('reason', config='english'), name='infraction_reason_search_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0100_infraction_reason_search_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='infraction',
+            index=models.Index(condition=models.Q(('active', True)), fields=['expires_at'], name='infraction_active_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='infraction',
+            index=models.Index(fields=['user', 'type', 'active'], name='infraction_user_type_idx'),
+        ),
+    ]
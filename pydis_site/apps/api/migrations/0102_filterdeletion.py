@@ -0,0 +1,25 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:40
+
+import pydis_site.apps.api.models.mixins
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0101_infraction_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilterDeletion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('filter_list', 'Filter list'), ('filter', 'Filter')], help_text='Whether a filter list or a filter was deleted.', max_length=11)),
+                ('object_id', models.IntegerField(help_text='The ID of the deleted filter list or filter.')),
+                ('list_id', models.IntegerField(help_text='The ID of the filter list the deleted object was part of.')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, help_text='When the filter list or filter was deleted.')),
+            ],
+            bases=(pydis_site.apps.api.models.mixins.ModelReprMixin, models.Model),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0102_filterdeletion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='infraction',
+            index=models.Index(fields=['-inserted_at', '-id'], name='infraction_inserted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='infraction',
+            index=models.Index(fields=['actor', '-inserted_at', '-id'], name='infraction_actor_inserted_idx'),
+        ),
+    ]
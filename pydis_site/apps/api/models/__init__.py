@@ -6,12 +6,15 @@ from .bot import (
     DeletedMessage,
     DocumentationLink,
     Filter,
+    FilterDeletion,
     FilterList,
     Infraction,
     MailingList,
     MailingListSeenItem,
     Message,
     MessageDeletionContext,
+    MetricityActivity,
+    MetricityActivityCheckpoint,
     Nomination,
     NominationEntry,
     OffensiveMessage,
@@ -30,12 +33,15 @@ __all__ = (
     "DeletedMessage",
     "DocumentationLink",
     "Filter",
+    "FilterDeletion",
     "FilterList",
     "Infraction",
     "MailingList",
     "MailingListSeenItem",
     "Message",
     "MessageDeletionContext",
+    "MetricityActivity",
+    "MetricityActivityCheckpoint",
     "Nomination",
     "NominationEntry",
     "OffTopicChannelName",
@@ -1,4 +1,4 @@
-from .filters import FilterList, Filter
+from .filters import FilterDeletion, FilterList, Filter
 from .bot_setting import BotSetting
 from .bumped_thread import BumpedThread
 from .deleted_message import DeletedMessage
@@ -10,6 +10,7 @@ from .aoc_link import AocAccountLink
 from .mailing_list import MailingList
 from .mailing_list_seen_item import MailingListSeenItem
 from .message_deletion_context import MessageDeletionContext
+from .metricity_activity import MetricityActivity, MetricityActivityCheckpoint
 from .nomination import Nomination, NominationEntry
 from .off_topic_channel_name import OffTopicChannelName
 from .offensive_message import OffensiveMessage
@@ -25,12 +26,15 @@ __all__ = (
     "DeletedMessage",
     "DocumentationLink",
     "Filter",
+    "FilterDeletion",
     "FilterList",
     "Infraction",
     "MailingList",
     "MailingListSeenItem",
     "Message",
     "MessageDeletionContext",
+    "MetricityActivity",
+    "MetricityActivityCheckpoint",
     "Nomination",
     "NominationEntry",
     "OffTopicChannelName",
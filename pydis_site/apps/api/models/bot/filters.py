@@ -1,7 +1,11 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
 from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import Count, Max, UniqueConstraint
+from django.utils import timezone
 
 # Must be imported that way to avoid circular imports
 from pydis_site.apps.api.models.mixins import ModelReprMixin, ModelTimestampMixin
@@ -122,6 +126,19 @@ class FilterList(ModelTimestampMixin, ModelReprMixin, models.Model):
     def __str__(self) -> str:
         return f"Filter {FilterListType(self.list_type).label}list {self.name!r}"
 
+    @staticmethod
+    def get_version() -> tuple:
+        """
+        Return a value which changes whenever a filter list or filter is changed.
+
+        Creating or updating a row moves the latest `updated_at`, and deleting one
+        lowers the count. This is read from the database rather than bumped by signals
+        so that every worker agrees on it, regardless of the cache backend.
+        """
+        lists = FilterList.objects.aggregate(count=Count("id"), updated_at=Max("updated_at"))
+        filters = Filter.objects.aggregate(count=Count("id"), updated_at=Max("updated_at"))
+        return (*lists.values(), *filters.values())
+
 
 class FilterBase(ModelTimestampMixin, ModelReprMixin, models.Model):
     """One specific trigger of a list."""
@@ -259,3 +276,40 @@ class Filter(FilterBase):
                 ),
                 name="unique_filters"),
         )
+
+
+class FilterDeletion(ModelReprMixin, models.Model):
+    """A tombstone left behind by a deleted filter list or filter, for the filter change feed."""
+
+    FILTER_LIST = "filter_list"
+    FILTER = "filter"
+
+    # How long tombstones are kept. Clients which are further behind must resync from a snapshot.
+    RETENTION = timedelta(days=30)
+
+    kind = models.CharField(
+        choices=((FILTER_LIST, "Filter list"), (FILTER, "Filter")),
+        max_length=11,
+        help_text="Whether a filter list or a filter was deleted."
+    )
+    object_id = models.IntegerField(help_text="The ID of the deleted filter list or filter.")
+    list_id = models.IntegerField(help_text="The ID of the filter list the deleted object was part of.")
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        help_text="When the filter list or filter was deleted."
+    )
+
+    def __str__(self) -> str:
+        return f"Deleted {self.kind} {self.object_id}"
+
+    @classmethod
+    def get_retention_cutoff(cls) -> datetime:
+        """Return the time before which tombstones may have been pruned."""
+        return timezone.now() - cls.RETENTION
+
+    @classmethod
+    def record(cls, deletions: Iterable["FilterDeletion"]) -> None:
+        """Save the given tombstones, and prune those which are past their retention."""
+        cls.objects.bulk_create(deletions)
+        cls.objects.filter(deleted_at__lt=cls.get_retention_cutoff()).delete()
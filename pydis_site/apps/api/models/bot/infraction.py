@@ -1,9 +1,14 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection, models
 from django.utils import timezone
 
 from pydis_site.apps.api.models.bot.user import User
 from pydis_site.apps.api.models.mixins import ModelReprMixin
 
+# Text search configuration used for the full-text index on infraction reasons.
+REASON_SEARCH_CONFIG = "english"
+
 
 class Infraction(ModelReprMixin, models.Model):
     """An infraction for a Discord user."""
@@ -89,6 +94,34 @@ class Infraction(ModelReprMixin, models.Model):
                 name="unique_active_infraction_per_type_per_user"
             ),
         )
+        indexes = (
+            # Polled by the bot's scheduler for active infractions that expire soon.
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(active=True),
+                name="infraction_active_expiry_idx",
+            ),
+            # Looking up the infractions of a user by type, optionally by whether they're active.
+            models.Index(
+                fields=["user", "type", "active"],
+                name="infraction_user_type_idx",
+            ),
+            # Paginating through the history of infractions by cursor, newest first.
+            models.Index(
+                fields=["-inserted_at", "-id"],
+                name="infraction_inserted_at_idx",
+            ),
+            # Paginating through the infractions issued by an actor by cursor.
+            models.Index(
+                fields=["actor", "-inserted_at", "-id"],
+                name="infraction_actor_inserted_idx",
+            ),
+            # Must use the same expression as `reason_search_vector` to be used by searches.
+            GinIndex(
+                SearchVector("reason", config=REASON_SEARCH_CONFIG),
+                name="infraction_reason_search_idx",
+            ),
+        )
 
     def __str__(self):
         """Returns some info on the current infraction, for display purposes."""
@@ -98,3 +131,44 @@ class Infraction(ModelReprMixin, models.Model):
         if self.hidden:
             s += " (hidden)"
         return s
+
+    @staticmethod
+    def reason_search_vector() -> SearchVector:
+        """Return the full-text search vector of the reason, as covered by its index."""
+        return SearchVector("reason", config=REASON_SEARCH_CONFIG)
+
+    @staticmethod
+    def reason_search_query(query: str) -> SearchQuery:
+        """Return a full-text search query for reasons, in the syntax of web search engines."""
+        return SearchQuery(query, config=REASON_SEARCH_CONFIG, search_type="websearch")
+
+    @classmethod
+    def deactivate_expired(cls, limit: int) -> list["Infraction"]:
+        """
+        Deactivate up to `limit` active infractions that have expired, and return them.
+
+        Infractions which are being deactivated by a concurrent call are skipped,
+        so each expired infraction is only ever returned once.
+        """
+        quote_name = connection.ops.quote_name
+        table = quote_name(cls._meta.db_table)
+        columns = ", ".join(quote_name(field.column) for field in cls._meta.concrete_fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} SET active = false
+                WHERE id IN (
+                    SELECT id FROM {table}
+                    WHERE active AND expires_at <= now()
+                    ORDER BY expires_at, id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING {columns}
+                """,  # noqa: S608 - only the table and column names are interpolated
+                [limit]
+            )
+            attnames = [field.attname for field in cls._meta.concrete_fields]
+            infractions = [cls.from_db(connection.alias, attnames, row) for row in cursor.fetchall()]
+
+        return sorted(infractions, key=lambda infraction: (infraction.expires_at, infraction.id))
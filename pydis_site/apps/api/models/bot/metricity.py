@@ -1,8 +1,26 @@
+import functools
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import connections
+from prometheus_client import Counter
 
 BLOCK_INTERVAL = 10 * 60  # 10 minute blocks
 
+CACHE_HITS = Counter(
+    "metricity_cache_hits",
+    "Number of per-user metricity queries answered from the cache.",
+    ["query"],
+)
+CACHE_MISSES = Counter(
+    "metricity_cache_misses",
+    "Number of per-user metricity queries that had to hit the database.",
+    ["query"],
+)
+
 # This needs to be a list due to psycopg3 type adaptions.
 EXCLUDE_CHANNELS = [
     "267659945086812160",  # Bot commands
@@ -14,6 +32,35 @@ class NotFoundError(Exception):
     """Raised when an entity cannot be found."""
 
 
+def _cache_key(query: str, user_id: str) -> str:
+    """Return the cache key for the result of `query` for the given user."""
+    return f"metricity:{query}:{user_id}"
+
+
+def cached_query(method: Callable[["Metricity", str], Any]) -> Callable[["Metricity", str], Any]:
+    """
+    Cache the result of a per-user metricity query for `METRICITY_CACHE_TTL` seconds.
+
+    Metricity is only written to by the bot, so results are never invalidated by the site,
+    and the TTL bounds how stale they can be. Lookups that raise `NotFoundError` are not cached.
+    """
+    query = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self: "Metricity", user_id: str) -> Any:
+        key = _cache_key(query, user_id)
+        result = cache.get(key)
+        if result is not None:
+            CACHE_HITS.labels(query=query).inc()
+            return result
+
+        CACHE_MISSES.labels(query=query).inc()
+        result = method(self, user_id)
+        cache.set(key, result, settings.METRICITY_CACHE_TTL)
+        return result
+
+    return wrapper
+
 
 class Metricity:
     """Abstraction for a connection to the metricity database."""
@@ -27,69 +74,72 @@ class Metricity:
     def __exit__(self, *_):
         self.cursor.close()
 
-    def user(self, user_id: str) -> dict:
-        """Query a user's data."""
-        # TODO: Swap this back to some sort of verified at date
-        query = "SELECT joined_at FROM users WHERE id = '%s'"
-        self.cursor.execute(query, [user_id])
-        values = self.cursor.fetchone()
-
-        if not values:
-            raise NotFoundError
-
-        return {'joined_at': values[0]}
-
-    def total_messages(self, user_id: str) -> int:
-        """Query total number of messages for a user."""
-        self.cursor.execute(
-            """
-            SELECT
-                COUNT(*)
-            FROM messages
-            WHERE
-                author_id = '%s'
-                AND NOT is_deleted
-                AND channel_id != ALL(%s)
-            """,
-            [user_id, EXCLUDE_CHANNELS]
-        )
-        values = self.cursor.fetchone()
-
-        if not values:
-            raise NotFoundError
+    @cached_query
+    def user_activity(self, user_id: str) -> dict:
+        """
+        Query a user's data along with the total number of messages and activity blocks.
 
-        return values[0]
+        Activity blocks are the number of 10 minute blocks during which the user has been active.
+        This metric prevents users from spamming to achieve the message total threshold.
+        """
+        activity = self.user_activity_since(user_id, None)
+        return {
+            'joined_at': activity['joined_at'],
+            'total_messages': activity['total_messages'],
+            'activity_blocks': activity['activity_blocks'],
+        }
 
-    def total_message_blocks(self, user_id: str) -> int:
+    def user_activity_since(self, user_id: str, since: datetime | None) -> dict:
         """
-        Query number of 10 minute blocks during which the user has been active.
+        Query a user's data along with their message activity after `since` in a single query.
 
-        This metric prevents users from spamming to achieve the message total threshold.
+        In addition to the keys returned by `user_activity`, this returns the `first_block` and
+        `last_block` the user has been active in, in the same format as `message_activity`.
         """
         self.cursor.execute(
             """
-            SELECT
-                COUNT(*)
-            FROM (
+            WITH activity AS (
                 SELECT
-                    (floor((extract('epoch' from created_at) / %s )) * %s) AS interval
-                FROM messages
-                WHERE
-                    author_id='%s'
-                    AND NOT is_deleted
-                    AND channel_id != ALL(%s)
-                GROUP BY interval
-            ) block_query;
+                    COUNT(*) AS total_messages,
+                    COUNT(DISTINCT block) AS activity_blocks,
+                    MIN(block) AS first_block,
+                    MAX(block) AS last_block
+                FROM (
+                    SELECT
+                        floor(extract('epoch' from created_at) / %s)::bigint AS block
+                    FROM messages
+                    WHERE
+                        author_id = %s
+                        AND NOT is_deleted
+                        AND channel_id != ALL(%s)
+                        AND (%s::timestamptz IS NULL OR created_at > %s)
+                ) user_messages
+            )
+            SELECT
+                users.joined_at,
+                activity.total_messages,
+                activity.activity_blocks,
+                activity.first_block,
+                activity.last_block
+            FROM users
+                CROSS JOIN activity
+            WHERE
+                users.id = %s
             """,
-            [BLOCK_INTERVAL, BLOCK_INTERVAL, user_id, EXCLUDE_CHANNELS]
+            [BLOCK_INTERVAL, str(user_id), EXCLUDE_CHANNELS, since, since, str(user_id)]
         )
         values = self.cursor.fetchone()
 
         if not values:
             raise NotFoundError
 
-        return values[0]
+        return dict(zip(
+            ('joined_at', 'total_messages', 'activity_blocks', 'first_block', 'last_block'),
+            values,
+            strict=True
+        ))
 
+    @cached_query
     def top_channel_activity(self, user_id: str) -> list[tuple[str, int]]:
         """
         Query the top three channels in which the user is most active.
@@ -156,3 +206,187 @@ class Metricity:
         values = self.cursor.fetchall()
 
         return values
+
+    def message_histogram(
+        self,
+        user_ids: list[str],
+        bucket: str,
+        start: datetime,
+        end: datetime
+    ) -> list[tuple[str, datetime, int]]:
+        """
+        Query the number of messages sent by a list of users per `bucket` from `start` up to `end`.
+
+        `bucket` is a `date_trunc` field such as `'hour'` or `'day'`. Returns a list of
+        (user_id, bucket_start, message_count) tuples. Empty buckets are omitted.
+        """
+        self.cursor.execute(
+            """
+            SELECT
+                author_id,
+                date_trunc(%s, created_at) AS bucket,
+                COUNT(*)
+            FROM messages
+            WHERE
+                author_id = ANY(%s)
+                AND NOT is_deleted
+                AND channel_id != ALL(%s)
+                AND created_at >= %s
+                AND created_at < %s
+            GROUP BY author_id, bucket
+            """,
+            [bucket, user_ids, EXCLUDE_CHANNELS, start, end]
+        )
+        values = self.cursor.fetchall()
+
+        return values
+
+    def users(self, user_ids: list[str]) -> list[tuple[str, datetime]]:
+        """
+        Query the data of a list of users.
+
+        Returns a list of (user_id, joined_at) tuples. Users unknown to metricity are omitted.
+        """
+        self.cursor.execute(
+            """
+            SELECT
+                id, joined_at
+            FROM users
+            WHERE
+                id = ANY(%s)
+            """,
+            [user_ids]
+        )
+        values = self.cursor.fetchall()
+
+        return values
+
+    def total_messages_for_users(self, user_ids: list[str]) -> list[tuple[str, int]]:
+        """
+        Query the total number of messages for a list of users.
+
+        Returns a list of (user_id, message_count) tuples. Users without messages are omitted.
+        """
+        self.cursor.execute(
+            """
+            SELECT
+                author_id, COUNT(*)
+            FROM messages
+            WHERE
+                author_id = ANY(%s)
+                AND NOT is_deleted
+                AND channel_id != ALL(%s)
+            GROUP BY author_id
+            """,
+            [user_ids, EXCLUDE_CHANNELS]
+        )
+        values = self.cursor.fetchall()
+
+        return values
+
+    def total_message_blocks_for_users(self, user_ids: list[str]) -> list[tuple[str, int]]:
+        """
+        Query the number of 10 minute blocks during which each of a list of users has been active.
+
+        Returns a list of (user_id, block_count) tuples. Users without messages are omitted.
+        """
+        self.cursor.execute(
+            """
+            SELECT
+                author_id,
+                COUNT(DISTINCT floor(extract('epoch' from created_at) / %s))
+            FROM messages
+            WHERE
+                author_id = ANY(%s)
+                AND NOT is_deleted
+                AND channel_id != ALL(%s)
+            GROUP BY author_id
+            """,
+            [BLOCK_INTERVAL, user_ids, EXCLUDE_CHANNELS]
+        )
+        values = self.cursor.fetchall()
+
+        return values
+
+    def top_channel_activity_for_users(self, user_ids: list[str]) -> list[tuple[str, str, int]]:
+        """
+        Query the top three channels in which each of a list of users is most active.
+
+        Channels are grouped the same way as in `top_channel_activity`. Returns a list of
+        (user_id, channel_name, message_count) tuples, ordered by user and activity.
+        """
+        self.cursor.execute(
+            """
+            SELECT
+                author_id, channel_name, message_count
+            FROM (
+                SELECT
+                    author_id,
+                    CASE
+                        WHEN channels.name ILIKE 'help-%%' THEN 'the help channels'
+                        WHEN channels.name ILIKE 'ot%%' THEN 'off-topic'
+                        WHEN channels.name ILIKE '%%voice%%' THEN 'voice chats'
+                        ELSE channels.name
+                    END AS channel_name,
+                    COUNT(1) AS message_count,
+                    ROW_NUMBER() OVER (PARTITION BY author_id ORDER BY COUNT(1) DESC) AS rank
+                FROM
+                    messages
+                    LEFT JOIN channels ON channels.id = messages.channel_id
+                WHERE
+                    author_id = ANY(%s) AND NOT messages.is_deleted
+                GROUP BY
+                    author_id, channel_name
+            ) ranked_channels
+            WHERE
+                rank <= 3
+            ORDER BY
+                author_id, rank
+            """,
+            [user_ids]
+        )
+        values = self.cursor.fetchall()
+
+        return values
+
+    def message_activity(
+        self,
+        since: datetime | None,
+        until: datetime | None = None,
+        user_ids: list[str] | None = None
+    ) -> list[tuple[str, int, int, int, int]]:
+        """
+        Query the message activity of users in the period after `since` up to and including `until`.
+
+        Returns a list of (user_id, message_count, block_count, first_block, last_block) tuples,
+        where blocks are numbered as seconds since the epoch divided by `BLOCK_INTERVAL`.
+        Either bound may be `None` to leave the period open on that side. If `user_ids` is
+        `None`, the activity of all users is returned.
+        """
+        self.cursor.execute(
+            """
+            SELECT
+                author_id,
+                COUNT(*),
+                COUNT(DISTINCT block),
+                MIN(block),
+                MAX(block)
+            FROM (
+                SELECT
+                    author_id,
+                    floor(extract('epoch' from created_at) / %s)::bigint AS block
+                FROM messages
+                WHERE
+                    NOT is_deleted
+                    AND channel_id != ALL(%s)
+                    AND (%s::timestamptz IS NULL OR created_at > %s)
+                    AND (%s::timestamptz IS NULL OR created_at <= %s)
+                    AND (%s::varchar[] IS NULL OR author_id = ANY(%s))
+            ) activity_query
+            GROUP BY author_id
+            """,
+            [BLOCK_INTERVAL, EXCLUDE_CHANNELS, since, since, until, until, user_ids, user_ids]
+        )
+        values = self.cursor.fetchall()
+
+        return values
@@ -0,0 +1,78 @@
+from django.db import models
+
+from pydis_site.apps.api.models.mixins import ModelReprMixin
+
+
+class MetricityActivityCheckpoint(ModelReprMixin, models.Model):
+    """The point up to which metricity messages have been rolled up into `MetricityActivity`."""
+
+    processed_until = models.DateTimeField(
+        help_text="Messages created up to and including this time have been rolled up."
+    )
+
+    @classmethod
+    def get(cls) -> "MetricityActivityCheckpoint | None":
+        """Return the checkpoint, or `None` if no roll up has been done yet."""
+        return cls.objects.first()
+
+    @classmethod
+    def get_with_activity(
+        cls, user_id: int
+    ) -> tuple["MetricityActivityCheckpoint | None", "MetricityActivity"]:
+        """
+        Return the checkpoint along with the activity of the given user rolled up until it.
+
+        Both are read in a single query, so that they match each other even while
+        a roll up is being committed.
+        """
+        fields = ("total_messages", "activity_blocks", "last_block")
+        rollup = MetricityActivity.objects.filter(user_id=user_id)
+        checkpoint = cls.objects.annotate(**{
+            f"activity_{field}": models.Subquery(rollup.values(field)) for field in fields
+        }).first()
+
+        activity = MetricityActivity(user_id=user_id)
+        if checkpoint is not None and checkpoint.activity_total_messages is not None:
+            for field in fields:
+                setattr(activity, field, getattr(checkpoint, f"activity_{field}"))
+        return checkpoint, activity
+
+
+class MetricityActivity(ModelReprMixin, models.Model):
+    """
+    Message totals of a single user, rolled up from the metricity database.
+
+    This is kept up to date by the `rollup_metricity_activity` management command, which only
+    processes messages created after the `MetricityActivityCheckpoint`.
+    """
+
+    user_id = models.BigIntegerField(
+        primary_key=True,
+        help_text="The ID of the user, taken from Discord. The user may be unknown to the site.",
+        verbose_name="User ID",
+    )
+    total_messages = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of messages counted towards the user's activity."
+    )
+    activity_blocks = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of distinct 10 minute blocks in which the user has sent messages."
+    )
+    last_block = models.BigIntegerField(
+        null=True,
+        help_text="The most recent block counted in `activity_blocks`, used to avoid counting it twice."
+    )
+
+    def add(self, message_count: int, block_count: int, first_block: int, last_block: int) -> None:
+        """
+        Add the activity of a period following the one already rolled up.
+
+        This is given in the same format as returned by `Metricity.message_activity`.
+        """
+        self.total_messages += message_count
+        self.activity_blocks += block_count
+        if first_block == self.last_block:
+            # The new period started inside of a block that was already counted.
+            self.activity_blocks -= 1
+        self.last_block = last_block
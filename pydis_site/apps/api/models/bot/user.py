@@ -1,12 +1,12 @@
 from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connection, models
 
 from pydis_site.apps.api.models.bot.role import Role
 from pydis_site.apps.api.models.mixins import ModelReprMixin, ModelTimestampMixin
 
 
-class User(ModelReprMixin, models.Model):
+class User(ModelReprMixin, ModelTimestampMixin, models.Model):
     """A Discord user."""
 
     id = models.BigIntegerField(
@@ -64,12 +64,41 @@ class User(ModelReprMixin, models.Model):
         verbose_name="Alternative accounts"
     )
 
+    class Meta:
+        """Index the modification timestamp to look up recently changed users."""
+
+        indexes = (
+            models.Index(fields=("updated_at",), name="user_updated_at_idx"),
+        )
+
     def __str__(self):
         """Returns the name and discriminator for the current user, for display purposes."""
         if self.discriminator:
             return f"{self.name}#{self.discriminator:04d}"
         return self.name
 
+    def alt_cluster(self) -> list[int]:
+        """
+        Return the IDs of all users transitively linked to this user as alternate accounts.
+
+        The cluster is resolved in a single recursive query, and does not include this user.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH RECURSIVE cluster(id) AS (
+                    SELECT %s::bigint
+                    UNION
+                    SELECT relationship.target_id
+                    FROM api_useraltrelationship relationship
+                        JOIN cluster ON relationship.source_id = cluster.id
+                )
+                SELECT id FROM cluster WHERE id != %s ORDER BY id
+                """,
+                [self.id, self.id]
+            )
+            return [user_id for user_id, in cursor.fetchall()]
+
     @property
     def top_role(self) -> Role:
         """
@@ -1,6 +1,15 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import ParseError
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework.views import APIView
 
 
 class LimitOffsetPaginationExtended(LimitOffsetPagination):
@@ -39,10 +48,82 @@ class LimitOffsetPaginationExtended(LimitOffsetPagination):
     ...     "reason": None,
     ...     "hidden": False
     ... }]
+
+    ## Cursor pagination
+    For views which define a `cursor_ordering`, results are instead paginated by their
+    position in that ordering if the `cursor` query parameter is given, which keeps deep
+    pages as fast as the first one. The fields of the ordering must together be unique for
+    every object, and should be covered by an index.
+    An empty `cursor` starts at the first page, and the `next_cursor` of each response
+    continues after it, until it is `None`. The `ordering` query parameter is ignored.
+    >>> {
+    ...     "next_cursor": "WyIyMDIxLTAxLTI2VDIxOjEzOjM1LjQ3Nzg3OSswMDowMCIsICI2Il0=",
+    ...     "results": [...]
+    ... }
     """
 
     default_limit = 100
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: APIView | None = None) -> list:
+        """Paginate by cursor if the view supports it and `cursor` was given, otherwise by limit and offset."""
+        self.cursor = None
+        self.cursor_ordering = getattr(view, "cursor_ordering", None)
+        if not self.cursor_ordering or self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor = request.query_params[self.cursor_query_param]
+        self.limit = self.get_limit(request)
+
+        queryset = queryset.order_by(*self.cursor_ordering)
+        if self.cursor:
+            queryset = queryset.filter(self.get_position_filter(queryset.model, self.cursor))
+
+        # Fetch one more object than requested to find out whether there's a next page.
+        page = list(queryset[:self.limit + 1])
+        self.next_cursor = self.encode_cursor(page[self.limit - 1]) if len(page) > self.limit else None
+        return page[:self.limit]
+
+    def encode_cursor(self, instance: Model) -> str:
+        """Encode the position of the given object in `cursor_ordering` as an opaque cursor."""
+        position = [
+            instance._meta.get_field(field.lstrip("-")).value_to_string(instance)
+            for field in self.cursor_ordering
+        ]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def get_position_filter(self, model: type[Model], cursor: str) -> Q:
+        """Get a filter for objects which come after the position encoded in the cursor."""
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(position, list) or len(position) != len(self.cursor_ordering):
+                raise ValueError("Cursor does not match the ordering.")
+            values = [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.cursor_ordering, position, strict=True)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise ParseError(detail={self.cursor_query_param: ["Invalid cursor."]})
+
+        # (a, b) after (x, y) in ascending order is `a > x OR (a = x AND b > y)`. Postgres
+        # can't scan an index by that alone, so it is also bounded by `a >= x`.
+        leading = self.cursor_ordering[0]
+        lookup = "lte" if leading.startswith("-") else "gte"
+        bound = Q(**{f"{leading.lstrip('-')}__{lookup}": values[0]})
+        position_filter = Q()
+        for index, field in enumerate(self.cursor_ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            preceding = {
+                preceding_field.lstrip("-"): value
+                for preceding_field, value in zip(self.cursor_ordering[:index], values, strict=False)
+            }
+            position_filter |= Q(**preceding, **{f"{name}__{lookup}": values[index]})
+        return bound & position_filter
 
     def get_paginated_response(self, data: ReturnList) -> Response:
         """Override to skip metadata i.e. `count`, `next`, and `previous`."""
+        if self.cursor is not None:
+            return Response({"next_cursor": self.next_cursor, "results": data})
+
         return Response(data)
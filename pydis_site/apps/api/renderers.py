@@ -0,0 +1,29 @@
+import json
+from typing import Any
+
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renderer for newline-delimited JSON.
+
+    Views using this renderer are expected to stream their rows themselves, for
+    example via a `StreamingHttpResponse`. This renderer is only used to render
+    responses that are built by DRF itself, such as errors, as a single line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: str | None = None,
+        renderer_context: dict | None = None
+    ) -> bytes:
+        """Render `data` as a single line of JSON."""
+        if data is None:
+            return b""
+        return (json.dumps(data) + "\n").encode()
@@ -1,17 +1,26 @@
 """Converters from Django models to data interchange formats and back."""
+from collections import defaultdict
 from datetime import timedelta
 from typing import Any
 
-from django.db import models
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import connection, models, transaction
+from django.db.models.functions import JSONObject
 from django.db.models.query import QuerySet
 from django.db.utils import IntegrityError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.exceptions import NotFound
 from rest_framework.serializers import (
+    BooleanField,
+    CharField,
+    DateTimeField,
     IntegerField,
     ListField,
     ListSerializer,
     ModelSerializer,
     PrimaryKeyRelatedField,
+    Serializer,
     SerializerMethodField,
     ValidationError
 )
@@ -353,11 +362,58 @@ class FilterSerializer(ModelSerializer):
         }
 
         schema = {name: getattr(instance, name) for name in BASE_FILTER_FIELDS}
-        schema['filter_list'] = instance.filter_list.id
+        schema['filter_list'] = instance.filter_list_id
         schema['settings'] = settings
         return schema
 
 
+class FilterBulkItemSerializer(FilterSerializer):
+    """
+    A class validating a single filter of a bulk import request.
+
+    The filter list is given once for the whole batch through the `filter_list` context
+    key, so that its settings are not fetched again for every filter. The uniqueness of
+    the filters is checked for the whole batch at once.
+    """
+
+    class Meta(FilterSerializer.Meta):
+        """Metadata defined for the Django REST Framework."""
+
+        fields = tuple(field for field in FilterSerializer.Meta.fields if field != 'filter_list')
+        validators = []
+
+    def validate(self, data: dict) -> dict:
+        """Validate the filter against the settings of the filter list it is imported into."""
+        data['filter_list'] = self.context['filter_list']
+        return super().validate(data)
+
+
+class FilterBulkSerializer(Serializer):
+    """
+    A class providing validation of requests importing multiple filters into a filter list.
+
+    The filters themselves are validated one by one using `FilterBulkItemSerializer`,
+    to report the errors of each filter separately.
+    """
+
+    MAX_FILTERS = 10_000
+
+    filter_list = PrimaryKeyRelatedField(queryset=FilterList.objects.all())
+    replace = BooleanField(default=False)
+    filters = ListField(max_length=MAX_FILTERS)
+
+
+class FilterMatchSerializer(Serializer):
+    """A class providing validation of requests matching messages against the filters."""
+
+    MAX_MESSAGES = 1000
+
+    messages = ListField(
+        child=CharField(allow_blank=True, trim_whitespace=False, max_length=4000),
+        max_length=MAX_MESSAGES,
+    )
+
+
 class FilterListSerializer(ModelSerializer):
     """A class providing (de-)serialization of `FilterList` instances."""
 
@@ -437,7 +493,7 @@ class FilterListSerializer(ModelSerializer):
         schema = {name: getattr(instance, name) for name in BASE_FILTERLIST_FIELDS}
         schema['filters'] = [
             FilterSerializer(many=False).to_representation(instance=item)
-            for item in Filter.objects.filter(filter_list=instance.id).prefetch_related('filter_list')
+            for item in instance.filters.all()
         ]
 
         settings = {name: getattr(instance, name) for name in BASE_SETTINGS_FIELDS}
@@ -498,23 +554,104 @@ class InfractionSerializer(FrozenFieldsMixin, ModelSerializer):
         return attrs
 
 
+class InfractionBulkItemSerializer(InfractionSerializer):
+    """
+    A class validating a single infraction of a bulk creation request.
+
+    This does not query the database. Instead, the existence of the referenced users and
+    the uniqueness of active infractions are checked for the whole batch at once.
+    """
+
+    user = IntegerField(min_value=0)
+    actor = IntegerField(min_value=0)
+
+    class Meta(InfractionSerializer.Meta):
+        """Metadata defined for the Django REST Framework."""
+
+        validators = []
+
+
 class ExpandedInfractionSerializer(InfractionSerializer):
     """
     A class providing expanded (de-)serialization of `Infraction` instances.
 
     In addition to the fields of `Infraction` objects themselves, this
     serializer also attaches the `user` and `actor` fields when serializing.
+
+    Infractions from a queryset prepared with `expand_queryset` are serialized from the
+    JSON payloads it annotates, without loading any related objects.
     """
 
+    @staticmethod
+    def expand_queryset(queryset: QuerySet) -> QuerySet:
+        """
+        Annotate the given infraction queryset with the expanded `user` and `actor` payloads.
+
+        The payloads, including the alternate accounts of the user, are built by the
+        database as part of the query for the infractions themselves.
+        """
+        alt_alts = ArraySubquery(
+            UserAltRelationship.objects
+            .filter(source=models.OuterRef('target_id'))
+            .order_by('id')
+            .values('target_id')
+        )
+        alts = ArraySubquery(
+            UserAltRelationship.objects
+            .filter(source=models.OuterRef('user_id'))
+            .order_by('id')
+            .values(payload=JSONObject(
+                **{field: field for field in ('context', 'created_at', 'updated_at')},
+                **{field: f'{field}_id' for field in ('source', 'target', 'actor')},
+                alts=alt_alts,
+            ))
+        )
+        return queryset.annotate(
+            expanded_user=JSONObject(
+                **{field: f'user__{field}' for field in UserSerializer.Meta.fields},
+                alts=alts,
+            ),
+            expanded_actor=JSONObject(
+                **{field: f'actor__{field}' for field in UserSerializer.Meta.fields},
+            ),
+        )
+
     def to_representation(self, instance: Infraction) -> dict:
         """Return the dictionary representation of this infraction."""
         ret = super().to_representation(instance)
 
-        ret['user'] = UserWithAltsSerializer(instance.user).data
-        ret['actor'] = UserSerializer(instance.actor).data
+        if hasattr(instance, 'expanded_user'):
+            ret['user'] = self.expanded_user_representation(instance.expanded_user)
+            ret['actor'] = {
+                field: instance.expanded_actor[field] for field in UserSerializer.Meta.fields
+            }
+        else:
+            ret['user'] = UserWithAltsSerializer(instance.user).data
+            ret['actor'] = UserSerializer(instance.actor).data
 
         return ret
 
+    @staticmethod
+    def expanded_user_representation(payload: dict) -> dict:
+        """Convert an annotated user payload into the format of `UserWithAltsSerializer`."""
+        timestamp_field = DateTimeField()
+        user = {field: payload[field] for field in UserWithAltsSerializer.Meta.fields}
+        user['alts'] = [
+            {
+                **{
+                    field: alt[field]
+                    for field in UserAltRelationshipSerializer.Meta.fields
+                },
+                **{
+                    field: timestamp_field.to_representation(parse_datetime(alt[field]))
+                    for field in ('created_at', 'updated_at')
+                },
+                'alts': alt['alts'],
+            }
+            for alt in payload['alts']
+        ]
+        return user
+
 
 class OffTopicChannelNameListSerializer(ListSerializer):
     """Custom ListSerializer to override to_representation() when list views are triggered."""
@@ -597,6 +734,25 @@ class RoleSerializer(ModelSerializer):
 class UserListSerializer(ListSerializer):
     """List serializer for User model to handle bulk updates."""
 
+    def to_internal_value(self, data: list) -> list:
+        """Validate that the roles of all given users exist, using a single query."""
+        validated_data = super().to_internal_value(data)
+
+        roles = {role for user_data in validated_data for role in user_data.get("roles", ())}
+        unknown_roles = roles - set(Role.objects.filter(id__in=roles).values_list('id', flat=True))
+        if unknown_roles:
+            raise ValidationError([
+                {
+                    "roles": [
+                        f"Role with ID {role_id} does not exist"
+                        for role_id in sorted(unknown_roles.intersection(user_data["roles"]))
+                    ]
+                } if unknown_roles.intersection(user_data.get("roles", ())) else {}
+                for user_data in validated_data
+            ])
+
+        return validated_data
+
     def create(self, validated_data: list) -> list:
         """Override create method to optimize django queries."""
         new_users = []
@@ -613,6 +769,93 @@ class UserListSerializer(ListSerializer):
         User.objects.bulk_create(new_users, ignore_conflicts=True)
         return []
 
+    # Number of users inserted or updated by each statement of `upsert`.
+    UPSERT_BATCH_SIZE = 5000
+
+    def upsert(self) -> dict[str, int]:
+        """
+        Create the given users, updating the ones that already exist.
+
+        Fields which are not given for an existing user keep their current value.
+        Returns the number of users that were inserted, updated, and left unchanged.
+        """
+        validated_data = self.validated_data
+        seen = set()
+        for user_data in validated_data:
+            if user_data["id"] in seen:
+                raise ValidationError(
+                    {"id": [f"User with ID {user_data['id']} given multiple times."]}
+                )
+            seen.add(user_data["id"])
+
+        # Users are upserted together with the other users for which the same fields are given.
+        batches = defaultdict(list)
+        for user_data in validated_data:
+            batches[frozenset(user_data)].append(user_data)
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": len(validated_data)}
+        with transaction.atomic():
+            for given_fields, users in batches.items():
+                for start in range(0, len(users), self.UPSERT_BATCH_SIZE):
+                    batch = users[start:start + self.UPSERT_BATCH_SIZE]
+                    for inserted in self.upsert_batch(given_fields, batch):
+                        counts["inserted" if inserted else "updated"] += 1
+                        counts["unchanged"] -= 1
+
+        return counts
+
+    @staticmethod
+    def upsert_batch(given_fields: frozenset[str], batch: list[dict]) -> list[bool]:
+        """
+        Upsert the given users, for all of which the same fields are given, in a single statement.
+
+        Existing users are only written to if any of the given fields differ from their
+        current values. Returns whether each written user was inserted, rather than updated.
+
+        This is raw SQL since `bulk_create(update_conflicts=True)` neither supports a
+        condition on the update nor tells inserted rows apart from updated ones.
+        """
+        fields = User._meta.concrete_fields
+        fields_to_update = [
+            field for field in fields if field.name in given_fields and not field.primary_key
+        ]
+
+        now = timezone.now()
+        params = []
+        for user_data in batch:
+            user = User(**user_data, created_at=now, updated_at=now)
+            params.extend(
+                field.get_db_prep_save(getattr(user, field.attname), connection) for field in fields
+            )
+
+        quote_name = connection.ops.quote_name
+        table = quote_name(User._meta.db_table)
+        row = "(" + ", ".join(["%s"] * len(fields)) + ")"
+        columns = [quote_name(field.column) for field in fields_to_update]
+        assignments = ", ".join(
+            f"{column} = EXCLUDED.{column}" for column in [*columns, quote_name("updated_at")]
+        )
+        current = ", ".join(f"{table}.{column}" for column in columns)
+        given = ", ".join(f"EXCLUDED.{column}" for column in columns)
+
+        # The interpolated names are model metadata, all values are sent as parameters.
+        # `xmax` is only zero for rows which were inserted rather than updated.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote_name(field.column) for field in fields)}) "  # noqa: S608
+                f"VALUES {', '.join([row] * len(batch))} "
+                f"ON CONFLICT ({quote_name(User._meta.pk.column)}) DO UPDATE SET {assignments} "
+                f"WHERE ROW({current}) IS DISTINCT FROM ROW({given}) "
+                "RETURNING (xmax = 0)",
+                params
+            )
+            return [inserted for inserted, in cursor.fetchall()]
+
+    # Number of users from which on bulk updates are staged via COPY instead of being
+    # loaded into memory. Below this, both take about the same time, as measured by
+    # the `benchmark_user_bulk_patch` management command.
+    COPY_THRESHOLD = 20
+
     def update(self, queryset: QuerySet, validated_data: list) -> list:
         """
         Override update method to support bulk updates.
@@ -635,6 +878,13 @@ class UserListSerializer(ListSerializer):
                 )
             object_ids.add(data["id"])
 
+        if len(validated_data) >= self.COPY_THRESHOLD:
+            return self.update_via_copy(validated_data)
+        return self.update_in_memory(queryset, validated_data, object_ids)
+
+    @staticmethod
+    def update_in_memory(queryset: QuerySet, validated_data: list, object_ids: set[int]) -> list:
+        """Update the users by loading them into memory and saving them with `bulk_update`."""
         # filter queryset
         filtered_instances = queryset.filter(id__in=object_ids)
 
@@ -662,9 +912,84 @@ class UserListSerializer(ListSerializer):
                 {api_settings.NON_FIELD_ERRORS_KEY: ["Insufficient data provided."]}
             )
 
+        # `bulk_update` does not set `auto_now` fields on its own.
+        now = timezone.now()
+        for user in updated:
+            user.updated_at = now
+        fields_to_update.add("updated_at")
+
         User.objects.bulk_update(updated, fields_to_update)
         return updated
 
+    @staticmethod
+    def update_via_copy(validated_data: list) -> list:
+        """
+        Update the users by staging the given data in a temporary table and joining it.
+
+        The data is loaded into the staging table with COPY, after which all users are
+        updated by a single `UPDATE ... FROM` statement. Fields which are not given for a
+        user are staged as NULL and keep their current value.
+        """
+        fields_to_update = [
+            field for field in User._meta.concrete_fields
+            if not field.primary_key and any(field.name in data for data in validated_data)
+        ]
+        if not fields_to_update:
+            # Raise ValidationError when only id field is given.
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Insufficient data provided."]}
+            )
+
+        quote_name = connection.ops.quote_name
+        table = quote_name(User._meta.db_table)
+        staging_table = quote_name("user_bulk_update")
+        staging_fields = [User._meta.pk, *fields_to_update]
+        staging_columns = ", ".join(quote_name(field.column) for field in staging_fields)
+
+        # The interpolated names are model metadata, all values are sent through COPY.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {staging_table} ("
+                + ", ".join(
+                    f"{quote_name(field.column)} {field.db_type(connection)}"
+                    for field in staging_fields
+                )
+                + ", PRIMARY KEY (id)) ON COMMIT DROP"
+            )
+            with cursor.copy(f"COPY {staging_table} ({staging_columns}) FROM STDIN") as copy:
+                for data in validated_data:
+                    copy.write_row([data.get(field.name) for field in staging_fields])
+
+            assignments = ", ".join(
+                f"{quote_name(field.column)} = "
+                f"COALESCE(staged.{quote_name(field.column)}, {table}.{quote_name(field.column)})"
+                for field in fields_to_update
+            )
+            returned_fields = [field.attname for field in User._meta.concrete_fields]
+            cursor.execute(
+                f"UPDATE {table} SET {assignments}, updated_at = %s "  # noqa: S608
+                f"FROM {staging_table} AS staged WHERE {table}.id = staged.id "
+                "RETURNING "
+                + ", ".join(
+                    f"{table}.{quote_name(field.column)}" for field in User._meta.concrete_fields
+                ),
+                [timezone.now()]
+            )
+            updated = {
+                user.id: user
+                for user in (User.from_db(None, returned_fields, row) for row in cursor.fetchall())
+            }
+            cursor.execute(f"DROP TABLE {staging_table}")
+
+            if len(updated) != len(validated_data):
+                # Roll back the update when some of the users do not exist.
+                missing_id = next(
+                    data["id"] for data in validated_data if data["id"] not in updated
+                )
+                raise NotFound({"detail": f"User with id {missing_id} not found."})
+
+        return [updated[data["id"]] for data in validated_data]
+
 
 class UserAltRelationshipSerializer(FrozenFieldsMixin, ModelSerializer):
     """A class providing (de-)serialization of `UserAltRelationship` instances."""
@@ -691,6 +1016,32 @@ class UserAltRelationshipSerializer(FrozenFieldsMixin, ModelSerializer):
         return representation
 
 
+class UserAltLinkSerializer(Serializer):
+    """
+    A class providing validation of requests linking multiple users as alternate accounts.
+
+    Existence of the given users is not validated here, to allow the view to check it
+    in the same transaction that creates the relationships.
+    """
+
+    # Limits the request to linking 1225 pairs of users (2450 relationships) at once.
+    MAX_USERS = 50
+
+    users = ListField(
+        child=IntegerField(min_value=0),
+        min_length=2,
+        max_length=MAX_USERS,
+    )
+    actor = IntegerField(min_value=0)
+    context = CharField(max_length=1900)
+
+    def validate_users(self, users: list[int]) -> list[int]:
+        """Validate that the given users are distinct."""
+        if len(set(users)) != len(users):
+            raise ValidationError("Users may only be given once.")
+        return users
+
+
 
 class UserSerializer(ModelSerializer):
     """A class providing (de-)serialization of `User` instances."""
@@ -716,6 +1067,10 @@ class UserSerializer(ModelSerializer):
 
     def validate_roles(self, roles: list[int]) -> list[int]:
         """Validate that all given roles exist, using a single query."""
+        if isinstance(self.parent, UserListSerializer):
+            # The roles of all users are validated at once by the list serializer.
+            return roles
+
         existing_role_ids = set(
             Role.objects.filter(id__in=roles).values_list('id', flat=True)
         )
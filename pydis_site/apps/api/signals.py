@@ -1,7 +1,7 @@
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
-from pydis_site.apps.api.models.bot import Role, User
+from pydis_site.apps.api.models.bot import Filter, FilterDeletion, FilterList, Role, User
 
 
 @receiver(signal=post_delete, sender=Role)
@@ -10,3 +10,21 @@ def delete_role_from_user(sender: Role, instance: Role, **kwargs) -> None:
     for user in User.objects.filter(roles__contains=[instance.id]):
         del user.roles[user.roles.index(instance.id)]
         user.save()
+
+
+@receiver(signal=post_delete, sender=FilterList)
+def record_filter_list_deletion(sender: FilterList, instance: FilterList, **kwargs) -> None:
+    """Leave a tombstone for the deleted filter list (instance) in the filter change feed."""
+    FilterDeletion.record([
+        FilterDeletion(kind=FilterDeletion.FILTER_LIST, object_id=instance.id, list_id=instance.id)
+    ])
+
+
+@receiver(signal=post_delete, sender=Filter)
+def record_filter_deletion(sender: Filter, instance: Filter, **kwargs) -> None:
+    """Leave a tombstone for the deleted filter (instance) in the filter change feed."""
+    FilterDeletion.record([
+        FilterDeletion(
+            kind=FilterDeletion.FILTER, object_id=instance.id, list_id=instance.filter_list_id
+        )
+    ])
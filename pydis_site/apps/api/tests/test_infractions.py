@@ -1,4 +1,5 @@
 import datetime
+import json
 from datetime import UTC, datetime as dt, timedelta
 from unittest.mock import patch
 from urllib.parse import quote
@@ -11,7 +12,8 @@ from django.urls import reverse
 
 from .base import AuthenticatedAPITestCase
 from pydis_site.apps.api.models import Infraction, User, UserAltRelationship
-from pydis_site.apps.api.serializers import InfractionSerializer
+from pydis_site.apps.api.serializers import ExpandedInfractionSerializer, InfractionSerializer
+from pydis_site.apps.api.viewsets import InfractionViewSet
 
 
 class UnauthenticatedTests(AuthenticatedAPITestCase):
@@ -124,6 +126,36 @@ class InfractionTests(AuthenticatedAPITestCase):
         self.assertEqual(len(infractions), 1)
         self.assertEqual(infractions[0]['id'], self.ban_inactive.id)
 
+    def test_filter_reason_search(self):
+        url = reverse('api:bot:infraction-list')
+        cases = (
+            ('working', [self.ban_inactive]),
+            ('"filthy mouth"', [self.timeout_permanent]),
+            ('mouth or jerb', [self.timeout_permanent, self.ban_hidden]),
+            ('james -working', []),
+            ('mic', [self.voiceban_expires_later]),
+        )
+        for query, expected in cases:
+            with self.subTest(query=query):
+                response = self.client.get(url, {'reason_search': query})
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [infraction['id'] for infraction in response.json()],
+                    [infraction.id for infraction in expected],
+                )
+
+    def test_reason_search_uses_index(self):
+        queryset = Infraction.objects.alias(
+            reason_vector=Infraction.reason_search_vector()
+        ).filter(reason_vector=Infraction.reason_search_query('jerb'))
+        with connection.cursor() as cursor:
+            # The table is far too small for the planner to prefer the index on its own.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+
+        self.assertIn('infraction_reason_search_idx', plan)
+
     def test_filter_field(self):
         url = reverse('api:bot:infraction-list')
         response = self.client.get(f'{url}?type=ban&hidden=true')
@@ -352,6 +384,396 @@ class InfractionTests(AuthenticatedAPITestCase):
         })
 
 
+class InfractionCursorPaginationTests(AuthenticatedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(id=6, name='james', discriminator=1)
+        cls.actor = User.objects.create(id=7, name='moderator', discriminator=1)
+        inserted_at = (
+            dt(2020, 10, 10, 0, 0, tzinfo=UTC),
+            dt(2020, 10, 10, 0, 1, tzinfo=UTC),
+            dt(2020, 10, 10, 0, 1, tzinfo=UTC),  # Tied on `inserted_at`, ordered by ID.
+            dt(2020, 10, 10, 0, 2, tzinfo=UTC),
+            dt(2020, 10, 10, 0, 3, tzinfo=UTC),
+        )
+        cls.infractions = [
+            Infraction.objects.create(
+                user_id=cls.user.id,
+                actor_id=cls.actor.id if index % 2 else cls.user.id,
+                type='note',
+                reason=f'Note {index}',
+                active=False,
+                inserted_at=timestamp,
+            )
+            for index, timestamp in enumerate(inserted_at)
+        ]
+        # Newest first.
+        cls.infractions.reverse()
+
+    def get_pages(self, url: str, query_params: dict) -> list[list[int]]:
+        pages = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(url, {**query_params, 'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            pages.append([infraction['id'] for infraction in body['results']])
+            cursor = body['next_cursor']
+        return pages
+
+    def test_paginates_newest_first(self):
+        url = reverse('api:bot:infraction-list')
+        expected = [infraction.id for infraction in self.infractions]
+        for limit in (1, 2, 5, 10):
+            with self.subTest(limit=limit):
+                pages = self.get_pages(url, {'limit': limit})
+                self.assertEqual([infraction_id for page in pages for infraction_id in page], expected)
+                self.assertTrue(all(len(page) == limit for page in pages[:-1]))
+
+    def test_applies_filters(self):
+        url = reverse('api:bot:infraction-list-expanded')
+        pages = self.get_pages(url, {'limit': 1, 'actor__id': self.actor.id})
+        self.assertEqual(
+            pages,
+            [[infraction.id] for infraction in self.infractions if infraction.actor_id == self.actor.id],
+        )
+
+    def test_ignores_ordering(self):
+        url = reverse('api:bot:infraction-list')
+        pages = self.get_pages(url, {'limit': 2, 'ordering': 'inserted_at'})
+        self.assertEqual(
+            [infraction_id for page in pages for infraction_id in page],
+            [infraction.id for infraction in self.infractions],
+        )
+
+    def test_returns_400_for_invalid_cursor(self):
+        url = reverse('api:bot:infraction-list')
+        for cursor in ('nonsense', 'WyJub3QgYSBkYXRlIiwgIjEiXQ==', 'WyJvbmx5IG9uZSJd'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'cursor': ['Invalid cursor.']})
+
+
+class InfractionExpiryQueueTests(AuthenticatedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(id=6, name='james', discriminator=1)
+        now = dt.now(UTC)
+        cls.expired_ban = Infraction.objects.create(
+            user_id=cls.user.id, actor_id=cls.user.id, type='ban', active=True,
+            expires_at=now - timedelta(hours=2),
+        )
+        cls.expired_timeout = Infraction.objects.create(
+            user_id=cls.user.id, actor_id=cls.user.id, type='timeout', active=True,
+            expires_at=now - timedelta(hours=1),
+        )
+        cls.voice_ban = Infraction.objects.create(
+            user_id=cls.user.id, actor_id=cls.user.id, type='voice_ban', active=True,
+            expires_at=now + timedelta(hours=1),
+        )
+        cls.superstar = Infraction.objects.create(
+            user_id=cls.user.id, actor_id=cls.user.id, type='superstar', active=True,
+            expires_at=now + timedelta(hours=2),
+        )
+        # Neither of these ever expire.
+        Infraction.objects.create(
+            user_id=cls.user.id, actor_id=cls.user.id, type='voice_mute', active=True,
+        )
+        Infraction.objects.create(
+            user_id=cls.user.id, actor_id=cls.user.id, type='ban', active=False,
+            expires_at=now - timedelta(hours=3),
+        )
+
+    def test_expiring_returns_next_infractions_to_expire(self):
+        url = reverse('api:bot:infraction-expiring')
+        cases = (
+            ({}, [self.expired_ban, self.expired_timeout, self.voice_ban, self.superstar]),
+            ({'limit': 1}, [self.expired_ban]),
+            ({'after': dt.now(UTC).isoformat()}, [self.voice_ban, self.superstar]),
+            ({'types': 'ban,superstar'}, [self.expired_ban, self.superstar]),
+        )
+        for query_params, expected in cases:
+            with self.subTest(query_params=query_params):
+                response = self.client.get(url, query_params)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [infraction['id'] for infraction in response.json()],
+                    [infraction.id for infraction in expected],
+                )
+
+    def test_expiring_returns_400_for_invalid_query_parameters(self):
+        url = reverse('api:bot:infraction-expiring')
+        for query_params in ({'limit': 0}, {'limit': 1001}, {'limit': 'all'}, {'after': 'now'}):
+            with self.subTest(query_params=query_params):
+                response = self.client.get(url, query_params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.json()), list(query_params))
+
+    def test_expire_deactivates_expired_infractions(self):
+        url = reverse('api:bot:infraction-expire')
+        response = self.client.post(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(infraction['id'], infraction['active']) for infraction in response.json()],
+            [(self.expired_ban.id, False), (self.expired_timeout.id, False)],
+        )
+        self.assertEqual(
+            set(Infraction.objects.filter(active=True, expires_at__isnull=False)),
+            {self.voice_ban, self.superstar},
+        )
+
+        # Expired infractions are only returned once.
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_expire_respects_limit(self):
+        url = reverse('api:bot:infraction-expire')
+        response = self.client.post(f'{url}?limit=1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([infraction['id'] for infraction in response.json()], [self.expired_ban.id])
+        self.expired_timeout.refresh_from_db()
+        self.assertTrue(self.expired_timeout.active)
+
+
+class InfractionBulkCreationTests(AuthenticatedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create(
+            User(id=user_id, name=f'raider {user_id}', discriminator=user_id)
+            for user_id in range(1, 6)
+        )
+        cls.moderator = User.objects.create(id=100, name='moderator', discriminator=1)
+        cls.existing_ban = Infraction.objects.create(
+            user_id=5, actor_id=cls.moderator.id, type='ban', active=True
+        )
+
+    def ban(self, user_id: int, **kwargs) -> dict:
+        return {
+            'user': user_id,
+            'actor': self.moderator.id,
+            'type': 'ban',
+            'reason': 'Raid',
+            'active': True,
+        } | kwargs
+
+    def test_creates_infractions(self):
+        url = reverse('api:bot:infraction-bulk')
+        data = [self.ban(user_id) for user_id in range(1, 5)]
+        # Existing users, active infractions, savepoint, insert, release savepoint
+        with self.assertNumQueries(5):
+            response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body['errors'], {})
+        self.assertEqual([infraction['user'] for infraction in body['created']], [1, 2, 3, 4])
+        self.assertEqual(
+            set(Infraction.objects.filter(type='ban', active=True).values_list('user_id', flat=True)),
+            {1, 2, 3, 4, 5},
+        )
+        created = Infraction.objects.get(id=body['created'][0]['id'])
+        self.assertEqual(body['created'][0], InfractionSerializer(created).data | {
+            'inserted_at': body['created'][0]['inserted_at'],
+            'last_applied': body['created'][0]['last_applied'],
+        })
+
+    def test_reports_failed_infractions(self):
+        url = reverse('api:bot:infraction-bulk')
+        data = [
+            self.ban(1),
+            self.ban(5),  # Already has an active ban.
+            self.ban(2),
+            self.ban(2),  # Duplicate within the request.
+            self.ban(2, active=False),  # Inactive infractions never conflict.
+            self.ban(9999),  # Unknown user.
+            self.ban(3, type='kick'),  # Kicks cannot be active.
+            'not an infraction',
+        ]
+        response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(
+            [(infraction['user'], infraction['active']) for infraction in body['created']],
+            [(1, True), (2, True), (2, False)],
+        )
+        unique_error = {'non_field_errors': ['The fields user, type must make a unique set.']}
+        self.assertEqual(body['errors'], {
+            '1': unique_error,
+            '3': unique_error,
+            '5': {'user': ['Invalid pk "9999" - object does not exist.']},
+            '6': {'active': ['kick infractions cannot be active.']},
+            '7': {'non_field_errors': ['Invalid data. Expected a dictionary, but got str.']},
+        })
+        self.assertEqual(Infraction.objects.count(), 4)
+
+    def test_retries_after_concurrent_conflict(self):
+        url = reverse('api:bot:infraction-bulk')
+        insert_infractions = InfractionViewSet._insert_infractions
+
+        def create_conflicting_ban(valid: dict, errors: dict) -> None:
+            # Errors found by the failed attempt must not be reported.
+            errors[1] = {'non_field_errors': ['Failed attempt.']}
+            Infraction.objects.create(user_id=1, actor_id=self.moderator.id, type='ban', active=True)
+            patched.side_effect = insert_infractions
+            raise IntegrityError
+
+        with patch.object(InfractionViewSet, '_insert_infractions') as patched:
+            patched.side_effect = create_conflicting_ban
+            response = self.client.post(url, [self.ban(1), self.ban(2)])
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual([infraction['user'] for infraction in body['created']], [2])
+        self.assertEqual(body['errors'], {
+            '0': {'non_field_errors': ['The fields user, type must make a unique set.']},
+        })
+
+    def test_returns_400_for_repeated_conflicts(self):
+        url = reverse('api:bot:infraction-bulk')
+        with patch.object(Infraction.objects, 'bulk_create', side_effect=IntegrityError):
+            response = self.client.post(url, [self.ban(1)])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'non_field_errors': ['The infractions conflict with concurrent changes, please try again.']
+        })
+
+    def test_returns_400_for_invalid_body(self):
+        url = reverse('api:bot:infraction-bulk')
+        for data in ({'user': 1}, [self.ban(1)] * 1001):
+            with self.subTest(length=len(data)):
+                response = self.client.post(url, data)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(Infraction.objects.count(), 1)
+
+
+class InfractionQueryPlanTests(AuthenticatedAPITestCase):
+    """Verify that the queries the bot runs most often are answered using indexes."""
+
+    USER_COUNT = 100
+    INFRACTION_COUNT = 10_000
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            User(id=user_id, name=f"User {user_id}", discriminator=1)
+            for user_id in range(1, cls.USER_COUNT + 1)
+        )
+        types = [type_ for type_, _ in Infraction.TYPE_CHOICES]
+        now = dt.now(UTC)
+        Infraction.objects.bulk_create(
+            Infraction(
+                user=users[index % len(users)],
+                # Selective enough for the index by actor to beat filtering the full history.
+                actor=users[index % 10],
+                type=types[index % len(types)],
+                reason=f"Infraction {index}",
+                # Every combination of user and type is active at most once.
+                active=index < len(users) * len(types),
+                expires_at=now + timedelta(days=index % 365) if index % 3 else None,
+            )
+            for index in range(cls.INFRACTION_COUNT)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Infraction._meta.db_table}')
+
+    def assertUsesIndex(  # noqa: N802
+        self,
+        query_params: dict,
+        index: str,
+        url_name: str = 'api:bot:infraction-list',
+        query_count: int = 2,
+        index_cond: str | None = None,
+    ) -> None:
+        """
+        Assert that requesting infractions with `query_params` only scans the given index.
+
+        If `index_cond` is given, the scan must also be bounded by a condition on that column.
+        """
+        url = reverse(url_name)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, query_params)
+        self.assertEqual(response.status_code, 200)
+
+        # By default, both the count of the paginator and the query for the page itself.
+        infraction_queries = [
+            query['sql'] for query in queries if 'FROM "api_infraction"' in query['sql']
+        ]
+        self.assertEqual(len(infraction_queries), query_count)
+        for query in infraction_queries:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN {query}')
+                plan = '\n'.join(line for line, in cursor.fetchall())
+            self.assertIn(index, plan)
+            self.assertNotIn('Seq Scan', plan)
+            if index_cond is not None:
+                self.assertTrue(
+                    any(
+                        'Index Cond' in line and index_cond in line
+                        for line in plan.splitlines()
+                    ),
+                    plan,
+                )
+
+    def test_expiring_active_infractions_use_partial_index(self):
+        expires_before = dt.now(UTC) + timedelta(days=2)
+        self.assertUsesIndex(
+            {'active': 'true', 'expires_before': expires_before.isoformat()},
+            'infraction_active_expiry_idx',
+        )
+
+    def test_expiry_queue_uses_partial_index(self):
+        self.assertUsesIndex(
+            {'after': dt.now(UTC).isoformat(), 'limit': 10},
+            'infraction_active_expiry_idx',
+            url_name='api:bot:infraction-expiring',
+            query_count=1,
+        )
+
+    def test_infractions_of_user_by_type_use_composite_index(self):
+        cases = (
+            {'user__id': 5, 'type': 'ban'},
+            {'user__id': 5, 'type': 'ban', 'active': 'false'},
+            {'user__id': 5, 'types': 'ban,kick,timeout'},
+        )
+        for query_params in cases:
+            with self.subTest(query_params=query_params):
+                self.assertUsesIndex(query_params, 'infraction_user_type_idx')
+
+    def test_cursor_pages_use_ordering_index(self):
+        first_page = self.client.get(reverse('api:bot:infraction-list'), {'cursor': ''})
+        self.assertUsesIndex({'cursor': ''}, 'infraction_inserted_at_idx', query_count=1)
+        self.assertUsesIndex(
+            {'cursor': first_page.json()['next_cursor']},
+            'infraction_inserted_at_idx',
+            query_count=1,
+            index_cond='inserted_at',
+        )
+
+    def test_cursor_pages_of_actor_use_composite_index(self):
+        first_page = self.client.get(
+            reverse('api:bot:infraction-list'), {'cursor': '', 'actor__id': 1}
+        )
+        self.assertUsesIndex(
+            {'cursor': '', 'actor__id': 1},
+            'infraction_actor_inserted_idx',
+            query_count=1,
+            index_cond='actor_id',
+        )
+        self.assertUsesIndex(
+            {'cursor': first_page.json()['next_cursor'], 'actor__id': 1},
+            'infraction_actor_inserted_idx',
+            query_count=1,
+            index_cond='inserted_at',
+        )
+
+
 class CreationTests(AuthenticatedAPITestCase):
     @classmethod
     def setUpTestData(cls):
@@ -837,6 +1259,46 @@ class ExpandedTests(AuthenticatedAPITestCase):
         # Query count must stay constant regardless of the number of infractions.
         self.assertEqual(len(ctx.captured_queries), baseline_queries)
 
+    def test_list_expanded_query_count_is_constant(self):
+        url = reverse('api:bot:infraction-list-expanded')
+        users = User.objects.bulk_create(
+            User(id=user_id, name=f'alt {user_id}', discriminator=user_id)
+            for user_id in range(10, 30)
+        )
+        for alt in users:
+            UserAltRelationship.objects.create(
+                source=self.user, target=alt, context='alt account', actor=self.user
+            )
+            Infraction.objects.create(
+                user_id=alt.id, actor_id=self.user.id, type='warning', active=False
+            )
+
+        # The count of the paginator and the page itself.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 22)
+
+    def test_list_expanded_matches_serialized_objects(self):
+        alt = User.objects.create(id=6, name='jimmy', discriminator=2, roles=[1, 2])
+        UserAltRelationship.objects.create(
+            source=self.user, target=alt, context='alt account', actor=alt
+        )
+        UserAltRelationship.objects.create(
+            source=alt, target=self.user, context='alt account', actor=alt
+        )
+        Infraction.objects.create(user_id=self.user.id, actor_id=alt.id, type='note', hidden=True, active=False)
+
+        url = reverse('api:bot:infraction-list-expanded')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        infractions = Infraction.objects.all()
+        self.assertEqual(
+            response.json(),
+            json.loads(json.dumps(ExpandedInfractionSerializer(infractions, many=True).data)),
+        )
+
     def test_create_expanded(self):
         url = reverse('api:bot:infraction-list-expanded')
         data = {
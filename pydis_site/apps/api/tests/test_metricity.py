@@ -0,0 +1,161 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from pydis_site.apps.api.management.commands.rollup_metricity_activity import ROLLUP_LOCK_ID
+from pydis_site.apps.api.models import MetricityActivity, MetricityActivityCheckpoint
+from pydis_site.apps.api.models.bot.metricity import (
+    CACHE_HITS,
+    CACHE_MISSES,
+    Metricity,
+    NotFoundError,
+)
+
+
+@override_settings(METRICITY_CACHE_TTL=60)
+class MetricityCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        patcher = mock.patch("pydis_site.apps.api.models.bot.metricity.connections")
+        connections = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cursor = connections.__getitem__.return_value.cursor.return_value
+
+    def test_repeated_query_is_served_from_cache(self):
+        self.cursor.fetchone.return_value = ("foo", 10, 5, 1, 2)
+        hits = CACHE_HITS.labels(query="user_activity")._value.get()
+        misses = CACHE_MISSES.labels(query="user_activity")._value.get()
+        expected = {"joined_at": "foo", "total_messages": 10, "activity_blocks": 5}
+
+        with Metricity() as metricity:
+            self.assertEqual(metricity.user_activity(1), expected)
+        with Metricity() as metricity:
+            self.assertEqual(metricity.user_activity(1), expected)
+
+        self.cursor.execute.assert_called_once()
+        self.assertEqual(CACHE_HITS.labels(query="user_activity")._value.get(), hits + 1)
+        self.assertEqual(CACHE_MISSES.labels(query="user_activity")._value.get(), misses + 1)
+
+    def test_cache_is_keyed_on_user_and_query(self):
+        self.cursor.fetchone.return_value = ("foo", 10, 5, 1, 2)
+        self.cursor.fetchall.return_value = [("off-topic", 10)]
+
+        with Metricity() as metricity:
+            metricity.user_activity(1)
+            metricity.user_activity(2)
+            metricity.top_channel_activity(1)
+
+        self.assertEqual(self.cursor.execute.call_count, 3)
+
+    def test_not_found_is_not_cached(self):
+        self.cursor.fetchall.return_value = []
+
+        with Metricity() as metricity:
+            for _ in range(2):
+                with self.assertRaises(NotFoundError):
+                    metricity.top_channel_activity(1)
+
+        self.assertEqual(self.cursor.execute.call_count, 2)
+
+
+class RollupMetricityActivityTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch(
+            "pydis_site.apps.api.management.commands.rollup_metricity_activity.Metricity"
+        )
+        self.metricity = patcher.start().return_value.__enter__.return_value
+        self.addCleanup(patcher.stop)
+
+    def test_first_run_rolls_up_all_messages(self):
+        self.metricity.message_activity.return_value = [("1", 10, 3, 100, 105), ("2", 1, 1, 7, 7)]
+
+        call_command("rollup_metricity_activity", stdout=StringIO())
+
+        since, until = self.metricity.message_activity.call_args.args
+        self.assertIsNone(since)
+        self.assertEqual(MetricityActivityCheckpoint.get().processed_until, until)
+        self.assertQuerySetEqual(
+            MetricityActivity.objects.order_by("user_id").values_list(
+                "user_id", "total_messages", "activity_blocks", "last_block"
+            ),
+            [(1, 10, 3, 105), (2, 1, 1, 7)]
+        )
+
+    def test_later_runs_only_add_new_messages(self):
+        MetricityActivityCheckpoint.objects.create(
+            processed_until=timezone.now() - timedelta(days=8)
+        )
+        MetricityActivity.objects.create(
+            user_id=1, total_messages=10, activity_blocks=3, last_block=105
+        )
+        # The first new block of user 1 continues the last rolled up block.
+        self.metricity.message_activity.return_value = [("1", 4, 2, 105, 106), ("3", 2, 1, 9, 9)]
+        checkpoint = MetricityActivityCheckpoint.get()
+
+        call_command("rollup_metricity_activity", stdout=StringIO())
+
+        since, until = self.metricity.message_activity.call_args.args
+        self.assertEqual(since, checkpoint.processed_until)
+        self.assertEqual(MetricityActivityCheckpoint.objects.get().processed_until, until)
+        self.assertQuerySetEqual(
+            MetricityActivity.objects.order_by("user_id").values_list(
+                "user_id", "total_messages", "activity_blocks", "last_block"
+            ),
+            [(1, 14, 4, 106), (3, 2, 1, 9)]
+        )
+
+    def test_does_not_roll_up_messages_within_lag(self):
+        processed_until = timezone.now() - timedelta(days=1)
+        MetricityActivityCheckpoint.objects.create(processed_until=processed_until)
+
+        call_command("rollup_metricity_activity", stdout=StringIO())
+
+        self.metricity.message_activity.assert_not_called()
+        self.assertEqual(MetricityActivityCheckpoint.get().processed_until, processed_until)
+
+    def test_does_nothing_while_another_roll_up_is_in_progress(self):
+        other_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(other_connection.close)
+        with other_connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [ROLLUP_LOCK_ID])
+        self.addCleanup(
+            other_connection.cursor().execute, "SELECT pg_advisory_unlock(%s)", [ROLLUP_LOCK_ID]
+        )
+
+        stdout = StringIO()
+        call_command("rollup_metricity_activity", stdout=stdout)
+
+        self.metricity.message_activity.assert_not_called()
+        self.assertIsNone(MetricityActivityCheckpoint.get())
+        self.assertEqual(stdout.getvalue(), "Another roll up is in progress.\n")
+
+
+class MetricityActivityCheckpointTests(TestCase):
+    def test_get_with_activity_reads_rollup_with_checkpoint(self):
+        checkpoint = MetricityActivityCheckpoint.objects.create(processed_until=timezone.now())
+        MetricityActivity.objects.create(
+            user_id=1, total_messages=10, activity_blocks=3, last_block=105
+        )
+
+        for user_id, expected in ((1, (10, 3, 105)), (2, (0, 0, None))):
+            with self.subTest(user_id=user_id), self.assertNumQueries(1):
+                found, activity = MetricityActivityCheckpoint.get_with_activity(user_id)
+                self.assertEqual(found, checkpoint)
+                self.assertEqual(
+                    (activity.total_messages, activity.activity_blocks, activity.last_block),
+                    expected,
+                )
+
+    def test_get_with_activity_without_checkpoint(self):
+        checkpoint, activity = MetricityActivityCheckpoint.get_with_activity(1)
+
+        self.assertIsNone(checkpoint)
+        self.assertEqual(activity.total_messages, 0)
@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from prometheus_client import CollectorRegistry
+
+from pydis_site.apps.api.metrics import DatabasePoolCollector
+
+
+class DatabasePoolCollectorTests(SimpleTestCase):
+    def setUp(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {
+            "pool_size": 3,
+            "pool_max": 4,
+            "pool_available": 1,
+            "requests_num": 10,
+            "requests_queued": 2,
+            "requests_wait_ms": 1500,
+        }
+        connections = {
+            "default": mock.Mock(pool=pool),
+            "metricity": mock.Mock(pool=None),
+        }
+        patcher = mock.patch("pydis_site.apps.api.metrics.connections", connections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.registry = CollectorRegistry()
+        self.registry.register(DatabasePoolCollector())
+
+    def test_exports_pool_statistics(self):
+        for name, value in (
+            ("django_db_pool_size", 3),
+            ("django_db_pool_max_size", 4),
+            ("django_db_pool_available", 1),
+            ("django_db_pool_requests_waiting", 0),
+            ("django_db_pool_requests_total", 10),
+            ("django_db_pool_requests_queued_total", 2),
+            ("django_db_pool_requests_wait_seconds_total", 1.5),
+            ("django_db_pool_requests_errors_total", 0),
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(self.registry.get_sample_value(name, {"alias": "default"}), value)
+
+    def test_skips_databases_without_pool(self):
+        self.assertIsNone(
+            self.registry.get_sample_value("django_db_pool_size", {"alias": "metricity"})
+        )
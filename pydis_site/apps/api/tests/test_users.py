@@ -1,11 +1,22 @@
+import json
 import random
+from datetime import UTC, datetime
 from unittest.mock import Mock, patch
 
 from django.urls import reverse
+from django.utils import timezone
 
 from .base import AuthenticatedAPITestCase
-from pydis_site.apps.api.models import Infraction, Role, User, UserAltRelationship
+from pydis_site.apps.api.models import (
+    Infraction,
+    MetricityActivity,
+    MetricityActivityCheckpoint,
+    Role,
+    User,
+    UserAltRelationship
+)
 from pydis_site.apps.api.models.bot.metricity import NotFoundError
+from pydis_site.apps.api.serializers import UserListSerializer
 from pydis_site.apps.api.viewsets.bot.user import UserListPagination
 
 
@@ -329,6 +340,142 @@ class MultiPatchTests(AuthenticatedAPITestCase):
         self.assertEqual(response.status_code, 400)
 
 
+
+class MultiPatchViaCopyTests(MultiPatchTests):
+    """Run the bulk patch tests against the path staging the updates via COPY."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(UserListSerializer, "COPY_THRESHOLD", 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_keeps_fields_not_given(self):
+        url = reverse("api:bot:user-bulk-patch")
+        data = [
+            {"id": 2, "in_guild": False},
+            {"id": 1, "name": "user1patched"},
+        ]
+        response = self.client.patch(url, data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([user["id"] for user in response.json()], [2, 1])
+
+        self.user_1.refresh_from_db()
+        self.user_2.refresh_from_db()
+        self.assertEqual(
+            (self.user_1.name, self.user_1.discriminator, self.user_1.in_guild),
+            ("user1patched", 1111, True),
+        )
+        self.assertEqual(
+            (self.user_2.name, self.user_2.discriminator, self.user_2.in_guild),
+            ("Patch test user 2.", 2222, False),
+        )
+
+    def test_not_found_user_rolls_back_update(self):
+        url = reverse("api:bot:user-bulk-patch")
+        data = [
+            {"id": 1, "name": "User 1 patched again!!!"},
+            {"id": 22503405, "name": "User unknown not patched!"},
+        ]
+        response = self.client.patch(url, data=data)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "User with id 22503405 not found."})
+
+        self.user_1.refresh_from_db()
+        self.assertEqual(self.user_1.name, "Patch test user 1.")
+
+
+class UserUpsertTests(AuthenticatedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.roles = Role.objects.bulk_create(
+            Role(id=role_id, name=f"Role {role_id}", colour=1, permissions=0, position=role_id)
+            for role_id in (1, 2)
+        )
+        cls.user_1 = User.objects.create(
+            id=1,
+            name="Upsert test user 1",
+            display_name="User 1",
+            discriminator=1111,
+            roles=[1],
+        )
+        cls.user_2 = User.objects.create(
+            id=2,
+            name="Upsert test user 2",
+            discriminator=2222,
+            in_guild=False,
+        )
+
+    def test_upserts_users(self):
+        url = reverse("api:bot:user-bulk-upsert")
+        data = [
+            {"id": 1, "name": "Upsert test user 1", "discriminator": 1111, "roles": [1]},
+            {"id": 2, "name": "Renamed user 2", "discriminator": 2222, "roles": [1, 2]},
+            {"id": 3, "name": "New user 3", "discriminator": 3333, "roles": [2]},
+        ]
+        # Roles, savepoint, upsert, release savepoint
+        with self.assertNumQueries(4):
+            response = self.client.post(url, data=data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"inserted": 1, "updated": 1, "unchanged": 1})
+
+        user_2 = User.objects.get(id=2)
+        self.assertEqual((user_2.name, user_2.roles, user_2.in_guild), ("Renamed user 2", [1, 2], False))
+        user_3 = User.objects.get(id=3)
+        self.assertEqual((user_3.name, user_3.roles, user_3.in_guild), ("New user 3", [2], True))
+        self.assertEqual(User.objects.get(id=1).display_name, "User 1")
+
+    def test_upsert_does_not_rewrite_unchanged_users(self):
+        url = reverse("api:bot:user-bulk-upsert")
+        updated_at = User.objects.get(id=1).updated_at
+        data = [
+            {"id": 1, "name": "Upsert test user 1", "discriminator": 1111},
+            {"id": 2, "name": "Upsert test user 2", "discriminator": 2222, "in_guild": True},
+        ]
+        response = self.client.post(url, data=data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"inserted": 0, "updated": 1, "unchanged": 1})
+        self.assertEqual(User.objects.get(id=1).updated_at, updated_at)
+        self.assertTrue(User.objects.get(id=2).in_guild)
+
+    def test_returns_400_for_unknown_role_ids(self):
+        url = reverse("api:bot:user-bulk-upsert")
+        data = [
+            {"id": 1, "name": "Upsert test user 1", "discriminator": 1111, "roles": [1, 190810291]},
+            {"id": 3, "name": "New user 3", "discriminator": 3333, "roles": [2]},
+        ]
+        with self.assertNumQueries(1):
+            response = self.client.post(url, data=data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [
+            {"roles": ["Role with ID 190810291 does not exist"]},
+            {},
+        ])
+        self.assertFalse(User.objects.filter(id=3).exists())
+
+    def test_returns_400_for_duplicate_request_users(self):
+        url = reverse("api:bot:user-bulk-upsert")
+        data = [
+            {"id": 3, "name": "New user 3", "discriminator": 3333},
+            {"id": 3, "name": "New user 3 again", "discriminator": 3333},
+        ]
+        response = self.client.post(url, data=data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"id": ["User with ID 3 given multiple times."]})
+        self.assertFalse(User.objects.filter(id=3).exists())
+
+    def test_returns_400_for_bad_data(self):
+        url = reverse("api:bot:user-bulk-upsert")
+        for data in ({"id": 3, "name": "New user 3", "discriminator": 3333}, [{"id": 3}]):
+            with self.subTest(data=data):
+                response = self.client.post(url, data=data)
+                self.assertEqual(response.status_code, 400)
+
+
 class UserModelTests(AuthenticatedAPITestCase):
     @classmethod
     def setUpTestData(cls):
@@ -429,6 +576,170 @@ class UserPaginatorTests(AuthenticatedAPITestCase):
         self.assertEqual(1, response["previous_page_no"])
 
 
+class UserKeysetPaginatorTests(AuthenticatedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create([
+            User(id=i, name=f"user{i}", discriminator=1111, in_guild=True)
+            for i in range(1, 6)
+        ])
+
+    def test_returns_first_page_with_empty_after(self):
+        url = reverse("api:bot:user-list")
+        response = self.client.get(url, {"after": "", "limit": 2})
+        self.assertEqual(response.status_code, 200)
+        response = response.json()
+        self.assertEqual([user["id"] for user in response["results"]], [1, 2])
+        self.assertEqual(response["next_after"], 2)
+        self.assertNotIn("count", response)
+
+    def test_returns_users_after_given_id(self):
+        url = reverse("api:bot:user-list")
+        response = self.client.get(url, {"after": 2, "limit": 2}).json()
+        self.assertEqual([user["id"] for user in response["results"]], [3, 4])
+        self.assertEqual(response["next_after"], 4)
+
+    def test_last_page_has_no_next_after(self):
+        url = reverse("api:bot:user-list")
+        response = self.client.get(url, {"after": 3, "limit": 2}).json()
+        self.assertEqual([user["id"] for user in response["results"]], [4, 5])
+        self.assertIsNone(response["next_after"])
+
+    def test_defaults_to_page_size(self):
+        url = reverse("api:bot:user-list")
+        response = self.client.get(url, {"after": ""}).json()
+        self.assertEqual(len(response["results"]), 5)
+        self.assertIsNone(response["next_after"])
+
+    def test_applies_filters(self):
+        url = reverse("api:bot:user-list")
+        response = self.client.get(url, {"after": "", "name": "user3"}).json()
+        self.assertEqual([user["id"] for user in response["results"]], [3])
+
+    def test_returns_400_for_invalid_after(self):
+        url = reverse("api:bot:user-list")
+        response = self.client.get(url, {"after": "foo"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"after": ["This query parameter must be an integer."]})
+
+    def test_returns_400_for_invalid_limit(self):
+        url = reverse("api:bot:user-list")
+        for limit in ("foo", "0", "-1"):
+            with self.subTest(limit=limit):
+                response = self.client.get(url, {"after": "", "limit": limit})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(
+                    response.json(),
+                    {"limit": ["This query parameter must be a positive integer."]}
+                )
+
+
+class UserChangedSinceTests(AuthenticatedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(id=user_id, name=f"Delta user {user_id}", discriminator=user_id)
+            for user_id in range(1, 31)
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.last_sync = timezone.now()
+        User.objects.update(updated_at=self.last_sync - timezone.timedelta(hours=1))
+
+    def get_changed_user_ids(self) -> list[int]:
+        url = reverse('api:bot:user-list')
+        response = self.client.get(url, {'changed_since': self.last_sync.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        return [user['id'] for user in response.json()['results']]
+
+    def test_returns_no_users_without_changes(self):
+        self.assertEqual(self.get_changed_user_ids(), [])
+
+    def test_returns_users_changed_by_patch(self):
+        url = reverse('api:bot:user-detail', args=(2,))
+        self.assertEqual(self.client.patch(url, {'in_guild': False}).status_code, 200)
+        self.assertEqual(self.get_changed_user_ids(), [2])
+
+    def test_returns_users_changed_by_bulk_patch(self):
+        url = reverse('api:bot:user-bulk-patch')
+        for users in ([3], range(5, 30)):  # In memory and via COPY
+            with self.subTest(users=users):
+                data = [{'id': user_id, 'in_guild': False} for user_id in users]
+                self.assertEqual(self.client.patch(url, data).status_code, 200)
+                self.assertEqual(self.get_changed_user_ids()[-1], users[-1])
+        self.assertEqual(self.get_changed_user_ids(), [3, *range(5, 30)])
+
+    def test_returns_users_changed_by_bulk_upsert(self):
+        url = reverse('api:bot:user-bulk-upsert')
+        data = [
+            {'id': 1, 'name': "Delta user 1", 'discriminator': 1},
+            {'id': 4, 'name': "Renamed user 4", 'discriminator': 4},
+            {'id': 40, 'name': "New user 40", 'discriminator': 40},
+        ]
+        self.assertEqual(self.client.post(url, data).status_code, 200)
+        self.assertEqual(self.get_changed_user_ids(), [4, 40])
+
+    def test_returns_400_for_invalid_changed_since(self):
+        url = reverse('api:bot:user-list')
+        response = self.client.get(url, {'changed_since': "yesterday"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'changed_since': ["This query parameter must be an ISO 8601 timestamp."]}
+        )
+
+
+class UserExportTests(AuthenticatedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(
+            id=5,
+            name="Test role pls ignore",
+            colour=2,
+            permissions=0b01010010101,
+            position=1
+        )
+        User.objects.bulk_create([
+            User(id=i, name=f"user{i}", discriminator=1111, roles=[cls.role.id], in_guild=True)
+            for i in range(3, 0, -1)
+        ])
+
+    def get_lines(self, response):
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_streams_all_users_ordered_by_id(self):
+        url = reverse("api:bot:user-export")
+        response = self.client.get(url, HTTP_ACCEPT="application/x-ndjson")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(self.get_lines(response), [
+            {
+                "id": i,
+                "name": f"user{i}",
+                "display_name": "",
+                "discriminator": 1111,
+                "roles": [self.role.id],
+                "in_guild": True,
+            }
+            for i in range(1, 4)
+        ])
+
+    def test_applies_filters(self):
+        url = reverse("api:bot:user-export")
+        response = self.client.get(url, {"name": "user2"})
+
+        self.assertEqual([user["id"] for user in self.get_lines(response)], [2])
+
+    def test_unauthenticated_returns_401(self):
+        self.client.force_authenticate(user=None)
+        url = reverse("api:bot:user-export")
+        response = self.client.get(url, HTTP_ACCEPT="application/x-ndjson")
+
+        self.assertEqual(response.status_code, 401)
+
+
 class UserMetricityTests(AuthenticatedAPITestCase):
     @classmethod
     def setUpTestData(cls):
@@ -459,6 +770,37 @@ class UserMetricityTests(AuthenticatedAPITestCase):
             "activity_blocks": total_blocks
         })
 
+    def test_get_metricity_data_from_rollup(self):
+        # Given
+        self.mock_metricity_user("foo", 1, 1, [])
+        processed_until = timezone.now()
+        MetricityActivityCheckpoint.objects.create(processed_until=processed_until)
+        MetricityActivity.objects.create(
+            user_id=0, total_messages=50, activity_blocks=10, last_block=100
+        )
+        self.metricity.user_activity_since.return_value = dict(
+            joined_at="foo",
+            total_messages=5,
+            activity_blocks=2,
+            first_block=100,
+            last_block=101,
+        )
+
+        # When
+        url = reverse('api:bot:user-metricity-data', args=[0])
+        response = self.client.get(url)
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.metricity.user_activity_since.assert_called_once_with(0, processed_until)
+        self.metricity.user_activity.assert_not_called()
+        self.assertEqual(response.json(), {
+            "joined_at": "foo",
+            "total_messages": 55,
+            "voice_gate_blocked": False,
+            "activity_blocks": 11,
+        })
+
     def test_no_metricity_user(self):
         # Given
         self.mock_no_metricity_user()
@@ -616,14 +958,119 @@ class UserMetricityTests(AuthenticatedAPITestCase):
         self.metricity.total_messages_in_past_n_days.assert_not_called()
         self.assertEqual(response.json(), {'1': ['A valid integer is required.']})
 
+    def test_metricity_activity_histogram(self):
+        # Given
+        self.mock_no_metricity_user()  # Other functions shouldn't be used.
+        self.metricity.message_histogram.return_value = [
+            ("0", datetime(2024, 1, 1, 0, tzinfo=UTC), 5),
+            ("0", datetime(2024, 1, 1, 2, tzinfo=UTC), 2),
+            ("1", datetime(2024, 1, 1, 1, tzinfo=UTC), 3),
+        ]
+
+        # When
+        url = reverse("api:bot:user-metricity-activity-histogram")
+        response = self.client.post(
+            url,
+            data=[0, 1, 2],
+            QUERY_STRING="bucket=hour&start=2024-01-01T00:30:00&end=2024-01-01T03:00:00",
+        )
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.metricity.message_histogram.assert_called_once_with(
+            ["0", "1", "2"],
+            "hour",
+            datetime(2024, 1, 1, 0, tzinfo=UTC),
+            datetime(2024, 1, 1, 3, tzinfo=UTC),
+        )
+        self.assertEqual(response.json(), {
+            "bucket": "hour",
+            "buckets": ["2024-01-01T00:00:00Z", "2024-01-01T01:00:00Z", "2024-01-01T02:00:00Z"],
+            "counts": {"0": [5, 0, 2], "1": [0, 3, 0], "2": [0, 0, 0]},
+        })
+
+    def test_metricity_activity_histogram_invalid_query_parameters(self):
+        # Given
+        self.mock_no_metricity_user()  # Other functions shouldn't be used.
+        cases = (
+            ("", "start"),
+            ("start=yesterday", "start"),
+            ("start=2024-01-01&bucket=week", "bucket"),
+            ("start=2024-01-02&end=2024-01-01", "end"),
+            ("start=2020-01-01&end=2024-01-01", "end"),
+        )
+
+        # When
+        url = reverse("api:bot:user-metricity-activity-histogram")
+        for query_string, field in cases:
+            with self.subTest(query_string=query_string):
+                response = self.client.post(url, data=[0], QUERY_STRING=query_string)
+
+                # Then
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.json()), [field])
+        self.metricity.message_histogram.assert_not_called()
+
+    def test_metricity_bulk_data(self):
+        # Given
+        self.mock_no_metricity_user()  # Other functions shouldn't be used.
+        self.metricity.users.return_value = [("0", "foo"), ("1", "bar")]
+        self.metricity.total_messages_for_users.return_value = [("0", 10)]
+        self.metricity.total_message_blocks_for_users.return_value = [("0", 3)]
+        self.metricity.top_channel_activity_for_users.return_value = [
+            ("0", "off-topic", 6), ("0", "python-general", 4)
+        ]
+        Infraction.objects.create(user_id=0, actor_id=0, type="voice_ban", active=True)
+
+        # When
+        url = reverse("api:bot:user-metricity-bulk-data")
+        response = self.client.post(url, data=[0, 1, 2])
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.metricity.users.assert_called_once_with(["0", "1", "2"])
+        self.metricity.total_messages_for_users.assert_called_once_with(["0", "1"])
+        self.assertEqual(response.json(), {
+            "0": {
+                "joined_at": "foo",
+                "total_messages": 10,
+                "activity_blocks": 3,
+                "top_channel_activity": [["off-topic", 6], ["python-general", 4]],
+                "voice_gate_blocked": True,
+            },
+            "1": {
+                "joined_at": "bar",
+                "total_messages": 0,
+                "activity_blocks": 0,
+                "top_channel_activity": [],
+                "voice_gate_blocked": False,
+            },
+        })
+
+    def test_metricity_bulk_data_invalid_users(self):
+        # Given
+        self.mock_no_metricity_user()  # Other functions shouldn't be used.
+
+        # When
+        url = reverse("api:bot:user-metricity-bulk-data")
+        for data in ([], [123, "username"]):
+            with self.subTest(data=data):
+                response = self.client.post(url, data=data)
+
+                # Then
+                self.assertEqual(response.status_code, 400)
+        self.metricity.users.assert_not_called()
+
     def mock_metricity_user(self, joined_at, total_messages, total_blocks, top_channel_activity):
         patcher = patch("pydis_site.apps.api.viewsets.bot.user.Metricity")
         self.metricity = patcher.start()
         self.addCleanup(patcher.stop)
         self.metricity = self.metricity.return_value.__enter__.return_value
-        self.metricity.user.return_value = dict(joined_at=joined_at)
-        self.metricity.total_messages.return_value = total_messages
-        self.metricity.total_message_blocks.return_value = total_blocks
+        self.metricity.user_activity.return_value = dict(
+            joined_at=joined_at,
+            total_messages=total_messages,
+            activity_blocks=total_blocks,
+        )
         self.metricity.top_channel_activity.return_value = top_channel_activity
 
     def mock_no_metricity_user(self):
@@ -631,9 +1078,8 @@ class UserMetricityTests(AuthenticatedAPITestCase):
         self.metricity = patcher.start()
         self.addCleanup(patcher.stop)
         self.metricity = self.metricity.return_value.__enter__.return_value
-        self.metricity.user.side_effect = NotFoundError()
-        self.metricity.total_messages.side_effect = NotFoundError()
-        self.metricity.total_message_blocks.side_effect = NotFoundError()
+        self.metricity.user_activity.side_effect = NotFoundError()
+        self.metricity.user_activity_since.side_effect = NotFoundError()
         self.metricity.top_channel_activity.side_effect = NotFoundError()
 
 
@@ -1121,3 +1567,98 @@ class UserAltUpdateWithExistingTransitiveAltsTests(AuthenticatedAPITestCase):
                     self.assertEqual(len(set(alt['alts'])), len(subalts))
                     self.assertEqual(set(alt['alts']), subalts)
                     self.assertEqual(alt['source'], source)
+
+    def test_alt_cluster(self) -> None:
+        users = (self.user_1, self.user_2, self.user_3)
+        for user in users:
+            with self.subTest(user=user.id):
+                url = reverse('api:bot:user-alt-cluster', args=(user.id,))
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), {
+                    'id': user.id,
+                    'cluster': sorted(other.id for other in users if other != user),
+                    'relationships': [
+                        {
+                            'source': self.user_1.id,
+                            'target': self.user_2.id,
+                            'actor': self.user_1.id,
+                            'context': self.relationship_1.context,
+                        },
+                        {
+                            'source': self.user_2.id,
+                            'target': self.user_3.id,
+                            'actor': self.user_2.id,
+                            'context': self.relationship_3.context,
+                        },
+                    ],
+                })
+
+    def test_alt_cluster_without_alts(self) -> None:
+        user = User.objects.create(id=9, name="Lonely user", discriminator=1)
+        url = reverse('api:bot:user-alt-cluster', args=(user.id,))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'id': user.id, 'cluster': [], 'relationships': []})
+
+
+class UserAltLinkTests(AuthenticatedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create(
+            User(id=user_id, name=f"Test user {user_id}", discriminator=user_id)
+            for user_id in range(1, 6)
+        )
+        UserAltRelationship.objects.create(
+            source=cls.users[0],
+            target=cls.users[1],
+            context="Existing relationship",
+            actor=cls.users[0],
+        )
+        UserAltRelationship.objects.create(
+            source=cls.users[1],
+            target=cls.users[0],
+            context="Existing relationship",
+            actor=cls.users[0],
+        )
+
+    def test_link_alts(self) -> None:
+        url = reverse('api:bot:user-link-alts')
+        data = {'users': [1, 2, 3, 4], 'actor': 5, 'context': "Alt ring"}
+        with self.assertNumQueries(4):  # Savepoint, lock, insert, release
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 204)
+
+        for user in self.users[:4]:
+            self.assertQuerySetEqual(
+                user.alts.order_by('id'),
+                [other for other in self.users[:4] if other != user],
+            )
+        self.assertEqual(
+            UserAltRelationship.objects.get(source_id=1, target_id=2).context,
+            "Existing relationship",
+        )
+        self.assertEqual(UserAltRelationship.objects.filter(context="Alt ring").count(), 10)
+        self.assertFalse(self.users[4].alts.exists())
+
+    def test_link_alts_with_unknown_users(self) -> None:
+        url = reverse('api:bot:user-link-alts')
+        data = {'users': [3, 4, 6, 7], 'actor': 8, 'context': "Alt ring"}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'users': ["User with ID 6 does not exist", "User with ID 7 does not exist"],
+            'actor': ["User with ID 8 does not exist"],
+        })
+        self.assertFalse(UserAltRelationship.objects.filter(context="Alt ring").exists())
+
+    def test_link_alts_with_invalid_users(self) -> None:
+        url = reverse('api:bot:user-link-alts')
+        cases = ([], [1], [1, 1], [1, "username"], list(range(51)))
+        for users in cases:
+            with self.subTest(users=users):
+                response = self.client.post(
+                    url, {'users': users, 'actor': 5, 'context': "Alt ring"}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('users', response.json())
@@ -1,14 +1,53 @@
+import hashlib
+import json
+from datetime import UTC, datetime, timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Prefetch
+from django.http import HttpResponse, HttpResponseNotModified
+from django.http.request import HttpRequest
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from pydis_site.apps.api.filter_matching import get_matcher
 from pydis_site.apps.api.models.bot.filters import (  # - Preserving the filter order
+    FilterDeletion,
     FilterList,
     Filter
 )
 from pydis_site.apps.api.serializers import (  # - Preserving the filter order
+    FilterBulkItemSerializer,
+    FilterBulkSerializer,
     FilterListSerializer,
+    FilterMatchSerializer,
     FilterSerializer,
 )
 
+# Cache key of the rendered snapshot of all filter lists.
+SNAPSHOT_CACHE_KEY = "filters:snapshot"
+
+# Attribute names of the fields which must be unique together for filters.
+UNIQUE_FILTER_FIELDS = tuple(
+    Filter._meta.get_field(name).attname
+    for constraint in Filter._meta.constraints
+    if constraint.name == "unique_filters"
+    for name in constraint.fields
+)
+# How far the `until` of the change feed lags behind the current time. Changes become
+# visible when their transaction commits, which may be after their `updated_at`.
+CHANGES_OVERLAP = timedelta(minutes=1)
+DUPLICATE_FILTER_ERROR = (
+    "Check if a filter with this combination of content "
+    "and settings already exists in this filter list."
+)
+
 
 class FilterListViewSet(ModelViewSet):
     """
@@ -312,11 +351,140 @@ class FilterListViewSet(ModelViewSet):
     #### Status codes
     - 204: returned on success
     - 404: if a FilterList with the given `id` does not exist
+
+    ### GET /bot/filter/filter_lists/snapshot
+    Returns all FilterList items in the database, in the same format as
+    `GET /bot/filter/filter_lists`, ordered by `id` with their filters ordered by `id`.
+
+    The snapshot is only rebuilt after a filter list or filter has changed, and is
+    returned with a strong `ETag` header. Send it back in the `If-None-Match` header
+    to receive an empty 304 response while the filter configuration is unchanged.
+
+    #### Status codes
+    - 200: returned on success
+    - 304: if the snapshot matches the `If-None-Match` header
+
+    ### GET /bot/filter/filter_lists/changes
+    Returns the filter lists and filters which were created, updated or deleted
+    at or after the given time, ordered by `id`.
+
+    Changed filter lists are returned in full, including all of their filters.
+    Pass the returned `until` as `since` of the next request to receive the following
+    changes. To include changes which were still being committed, `until` lags a minute
+    behind the time of the request, so the same change is usually returned by more than
+    one request. Clients must de-duplicate changes by `id`.
+
+    Deletions are only kept for 30 days. If `since` is older than that, a 410 response
+    is returned instead, and the client must fetch a full snapshot before it can
+    continue from the current time.
+
+    #### Query parameters
+    - **since** `str`: ISO 8601 timestamp to return changes from, naive timestamps are
+      treated as UTC
+
+    #### Response format
+    >>> {
+    ...     "until": "2023-01-27T21:30:00.123456Z",
+    ...     "filter_lists": [
+    ...         {
+    ...             "id": 1,
+    ...             "name": "invite",
+    ...             ...
+    ...         }
+    ...     ],
+    ...     "filters": [
+    ...         {
+    ...             "id": 1,
+    ...             "filter_list": 1,
+    ...             "content": "267624335836053506",
+    ...             ...
+    ...         }
+    ...     ],
+    ...     "deleted_filter_lists": [2],
+    ...     "deleted_filters": [
+    ...         {"id": 5, "filter_list": 1}
+    ...     ]
+    ... }
+
+    #### Status codes
+    - 200: returned on success
+    - 400: if `since` is missing or is not an ISO 8601 timestamp
+    - 410: if `since` is older than the retained deletions, and a full resync is required
     """
 
     serializer_class = FilterListSerializer
     queryset = FilterList.objects.prefetch_related("filters")
 
+    @action(detail=False, methods=["GET"], url_path="snapshot", url_name="snapshot")
+    def snapshot(self, request: HttpRequest) -> HttpResponse:
+        """Return the rendered snapshot of all filter lists, or 304 if it is unchanged."""
+        etag, content = self.get_snapshot()
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type="application/json")
+        response.headers["ETag"] = etag
+        return response
+
+    @action(detail=False, methods=["GET"], url_path="changes", url_name="changes")
+    def changes(self, request: HttpRequest) -> Response:
+        """Return the filter lists and filters changed since the `since` query parameter."""
+        try:
+            since = datetime.fromisoformat(request.query_params["since"])
+        except (KeyError, ValueError):
+            raise ParseError(detail={
+                "since": ["This query parameter must be an ISO 8601 timestamp."]
+            })
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=UTC)
+        if since < FilterDeletion.get_retention_cutoff():
+            return Response(
+                {"since": ["Deletions since this time were pruned, a full resync is required."]},
+                status=status.HTTP_410_GONE,
+            )
+
+        # Taken before reading the changes, so that anything changed while they are
+        # read, or committed shortly after being saved, is returned again by the next request.
+        until = timezone.now() - CHANGES_OVERLAP
+
+        filter_lists = FilterList.objects.filter(updated_at__gte=since).order_by("id")
+        filter_lists = filter_lists.prefetch_related(
+            Prefetch("filters", queryset=Filter.objects.order_by("id"))
+        )
+        filters = Filter.objects.filter(updated_at__gte=since).order_by("id")
+        deletions = FilterDeletion.objects.filter(deleted_at__gte=since).order_by("object_id")
+
+        return Response({
+            "until": until,
+            "filter_lists": FilterListSerializer(filter_lists, many=True).data,
+            "filters": FilterSerializer(filters, many=True).data,
+            "deleted_filter_lists": [
+                deletion.object_id
+                for deletion in deletions if deletion.kind == FilterDeletion.FILTER_LIST
+            ],
+            "deleted_filters": [
+                {"id": deletion.object_id, "filter_list": deletion.list_id}
+                for deletion in deletions if deletion.kind == FilterDeletion.FILTER
+            ],
+        })
+
+    @classmethod
+    def get_snapshot(cls) -> tuple[str, bytes]:
+        """Return the ETag and content of the snapshot, rebuilding it if it is stale."""
+        version = FilterList.get_version()
+        cached = cache.get(SNAPSHOT_CACHE_KEY)
+        if cached is not None and cached[0] == version:
+            return cached[1:]
+
+        queryset = FilterList.objects.order_by("id").prefetch_related(
+            Prefetch("filters", queryset=Filter.objects.order_by("id"))
+        )
+        content = JSONRenderer().render(FilterListSerializer(queryset, many=True).data)
+        etag = quote_etag(hashlib.sha256(content).hexdigest())
+        cache.set(SNAPSHOT_CACHE_KEY, (version, etag, content), None)
+        return etag, content
+
 
 class FilterViewSet(ModelViewSet):
     """
@@ -493,7 +661,182 @@ class FilterViewSet(ModelViewSet):
     #### Status codes
     - 204: returned on success
     - 404: if a Filter with the given `id` does not exist
+
+    ### POST /bot/filter/filters/bulk
+    Imports up to 10000 filters into the given filter list at once. The filters take
+    the same fields as when creating a single filter, except for `filter_list`.
+
+    By default, the valid filters are created and the invalid ones, including those
+    which already exist in the filter list, are reported by their index in the request.
+    With `replace`, all filters of the filter list are replaced by the given ones
+    instead. Nothing is changed in that case if any of the given filters is invalid.
+
+    #### Request body
+    >>> {
+    ...     'filter_list': int,
+    ...     'replace': bool,  # optional, defaults to false
+    ...     'filters': [
+    ...         {
+    ...             'content': str,
+    ...             'description': str,
+    ...             ...
+    ...         },
+    ...         ...
+    ...     ]
+    ... }
+
+    #### Response format
+    >>> {
+    ...     'created': [
+    ...         {
+    ...             'id': 1,
+    ...             'content': "bad word",
+    ...             'filter_list': 1,
+    ...             ...
+    ...         }
+    ...     ],
+    ...     'errors': {
+    ...         '3': {'guild_pings': ['This field may not be null.']}
+    ...     }
+    ... }
+
+    #### Status codes
+    - 201: returned on success, even if some of the filters were not created
+    - 400: if the request body is invalid, or if any filter is invalid when replacing
+
+    ### POST /bot/filter/filters/match
+    Matches up to 1000 messages against the filters of the `token` and `domain`
+    filter lists, and returns the filters matched by each message, ordered by `id`.
+
+    Token filters match if their content, a regular expression, is found in the message
+    ignoring case. Domain filters match if the message contains a URL whose host is the
+    filter's domain or one of its subdomains. The settings of the filters and their
+    filter lists, such as whether they are enabled, are not taken into account.
+
+    The filters are compiled once and kept in memory until any filter changes.
+
+    #### Request body
+    >>> {
+    ...     'messages': [
+    ...         "Join us at https://discord.gg/python!",
+    ...         "Nothing to see here",
+    ...     ]
+    ... }
+
+    #### Response format
+    >>> {
+    ...     'matches': [
+    ...         [{'id': 9, 'filter_list': 2, 'content': "discord.gg"}],
+    ...         []
+    ...     ]
+    ... }
+
+    #### Status codes
+    - 200: returned on success
+    - 400: if the request body is invalid
     """
 
     serializer_class = FilterSerializer
     queryset = Filter.objects.all()
+
+    @action(detail=False, methods=["POST"], url_path="bulk", url_name="bulk")
+    def bulk_create(self, request: HttpRequest) -> Response:
+        """Import the given filters into a filter list, optionally replacing its filters."""
+        serializer = FilterBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filter_list = serializer.validated_data["filter_list"]
+        replace = serializer.validated_data["replace"]
+
+        errors = {}
+        filters = {}
+        for index, data in enumerate(serializer.validated_data["filters"]):
+            item = FilterBulkItemSerializer(data=data, context={"filter_list": filter_list})
+            if item.is_valid():
+                filters[index] = Filter(**item.validated_data)
+            else:
+                errors[index] = item.errors
+
+        try:
+            with transaction.atomic():
+                # Serialize imports into the same filter list.
+                FilterList.objects.select_for_update(no_key=True).get(id=filter_list.id)
+
+                if replace:
+                    existing = set()
+                else:
+                    existing = {
+                        self._get_unique_key(filter_)
+                        for filter_ in filter_list.filters.only(*UNIQUE_FILTER_FIELDS)
+                    }
+                for index, filter_ in list(filters.items()):
+                    key = self._get_unique_key(filter_)
+                    if key in existing:
+                        errors[index] = {"non_field_errors": [DUPLICATE_FILTER_ERROR]}
+                        del filters[index]
+                    existing.add(key)
+
+                if replace:
+                    if errors:
+                        raise ValidationError({"filters": dict(sorted(errors.items()))})
+                    self._delete_filters(filter_list)
+                Filter.objects.bulk_create(filters.values())
+        except IntegrityError:
+            # A conflicting filter was created concurrently by a different request.
+            raise ValidationError(DUPLICATE_FILTER_ERROR)
+
+        return Response(
+            {
+                "created": FilterSerializer(filters.values(), many=True).data,
+                "errors": dict(sorted(errors.items())),
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["POST"], url_path="match", url_name="match")
+    def match(self, request: HttpRequest) -> Response:
+        """Return the filters matched by each of the given messages."""
+        serializer = FilterMatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        matcher = get_matcher()
+        return Response({
+            "matches": [matcher.match(message) for message in serializer.validated_data["messages"]]
+        })
+
+    @staticmethod
+    def _delete_filters(filter_list: FilterList) -> None:
+        """
+        Delete all filters of the filter list, leaving tombstones for them in the change feed.
+
+        Unlike `QuerySet.delete`, this neither loads every filter nor records their
+        tombstones one by one in the `post_delete` receiver.
+        """
+        # A plain DELETE skips the `post_delete` receivers, which would record a tombstone
+        # per filter. Nothing refers to filters, so there's nothing to cascade to either.
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {quote_name(Filter._meta.db_table)} "  # noqa: S608 - only names are interpolated
+                f"WHERE {quote_name(Filter._meta.get_field('filter_list').column)} = %s "
+                f"RETURNING {quote_name(Filter._meta.pk.column)}",
+                [filter_list.id]
+            )
+            deleted_ids = [filter_id for filter_id, in cursor.fetchall()]
+
+        FilterDeletion.record(
+            FilterDeletion(kind=FilterDeletion.FILTER, object_id=filter_id, list_id=filter_list.id)
+            for filter_id in deleted_ids
+        )
+
+    @staticmethod
+    def _get_unique_key(filter_: Filter) -> tuple:
+        """Return the values of the filter which must be unique together, in a hashable form."""
+        key = []
+        for field in UNIQUE_FILTER_FIELDS:
+            value = getattr(filter_, field)
+            if isinstance(value, list):
+                value = tuple(value)
+            elif isinstance(value, dict):
+                value = json.dumps(value, sort_keys=True)
+            key.append(value)
+        return tuple(key)
@@ -1,9 +1,10 @@
 import datetime
 
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.db.models import QuerySet
 from django.http.request import HttpRequest
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
@@ -17,12 +18,20 @@ from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
 from pydis_site.apps.api.models.bot.infraction import Infraction
+from pydis_site.apps.api.models.bot.user import User
 from pydis_site.apps.api.pagination import LimitOffsetPaginationExtended
 from pydis_site.apps.api.serializers import (
     ExpandedInfractionSerializer,
+    InfractionBulkItemSerializer,
     InfractionSerializer
 )
 
+# Default and maximum number of infractions handled at once by the expiry queue endpoints.
+EXPIRY_QUEUE_DEFAULT_LIMIT = 100
+EXPIRY_QUEUE_MAX_LIMIT = 1000
+# Maximum number of infractions which may be created in a single bulk request.
+BULK_CREATE_MAX_INFRACTIONS = 1000
+
 
 class InfractionViewSet(
     CreateModelMixin,
@@ -45,6 +54,9 @@ class InfractionViewSet(
     - **hidden** `bool`: whether the infraction is a shadow infraction
     - **limit** `int`: number of results return per page (default 100)
     - **offset** `int`: the initial index from which to return the results (default 0)
+    - **cursor** `str`: switches to cursor pagination, see below
+    - **reason_search** `str`: full-text search on the infraction's reason, supporting
+      `"quoted phrases"`, `or` and `-excluded` words. Backed by an index, unlike `search`
     - **search** `str`: regular expression applied to the infraction's reason
     - **type** `str`: the type of the infraction
     - **types** `str`: comma separated sequence of types to filter for
@@ -77,8 +89,57 @@ class InfractionViewSet(
     ...     }
     ... ]
 
+    #### Cursor pagination
+    If the `cursor` query parameter is given, infractions are ordered by `inserted_at` and
+    `id` (newest first) and paginated by their position in that order instead of by offset,
+    so fetching a page is equally fast no matter how deep into the history it is. Pass an
+    empty `cursor` to get the first page, then pass the `next_cursor` of each response to
+    get the next page until it is `None`. `limit` still applies, `ordering` is ignored.
+    >>> {
+    ...     'next_cursor': 'WyIyMDE4LTExLTIyVDA3OjI0OjA2LjEzMjMwNyswMDowMCIsICI1Il0=',
+    ...     'results': [
+    ...         # Same format as above.
+    ...     ]
+    ... }
+
+    #### Status codes
+    - 200: returned on success
+    - 400: if the `cursor` is invalid
+
+    ### GET /bot/infractions/expiring
+    Retrieve the active infractions which are due to expire next, ordered by `expires_at`.
+    Supports the same filters as `GET /bot/infractions`, except for `ordering`.
+
+    #### Query parameters
+    - **after** `isodatetime`: only return infractions expiring after this time
+      (default: include infractions which have already expired)
+    - **limit** `int`: the maximum number of infractions to return (default 100, at most 1000)
+
+    #### Response format
+    >>> [
+    ...     # Same format as `GET /bot/infractions`, without pagination.
+    ... ]
+
     #### Status codes
     - 200: returned on success
+    - 400: if `after` or `limit` is invalid
+
+    ### POST /bot/infractions/expire
+    Atomically deactivate the active infractions which have expired, and return them ordered
+    by `expires_at`. Concurrent requests never return the same infraction twice, so each
+    expired infraction is handed to exactly one caller.
+
+    #### Query parameters
+    - **limit** `int`: the maximum number of infractions to deactivate (default 100, at most 1000)
+
+    #### Response format
+    >>> [
+    ...     # Same format as `GET /bot/infractions`, with `active` set to False.
+    ... ]
+
+    #### Status codes
+    - 200: returned on success
+    - 400: if `limit` is invalid
 
     ### GET /bot/infractions/<id:int>
     Retrieve a single infraction by ID.
@@ -115,6 +176,33 @@ class InfractionViewSet(
     - 201: returned on success
     - 400: if a given user is unknown or a field in the request body is invalid
 
+    ### POST /bot/infractions/bulk
+    Create multiple infractions at once, in a single transaction. Each infraction is validated
+    like in `POST /bot/infractions`, but infractions which are invalid, reference unknown users
+    or conflict with another active infraction of the same type for the same user are skipped
+    and reported instead of failing the whole request. At most 1000 infractions may be given.
+
+    #### Request body
+    >>> [
+    ...     # Same format as `POST /bot/infractions`.
+    ... ]
+
+    #### Response format
+    `created` holds the created infractions in the order they were given, `errors` maps the
+    index of each skipped infraction in the request body to its errors.
+    >>> {
+    ...     'created': [
+    ...         # Same format as `GET /bot/infractions`.
+    ...     ],
+    ...     'errors': {
+    ...         '3': {'non_field_errors': ['The fields user, type must make a unique set.']}
+    ...     }
+    ... }
+
+    #### Status codes
+    - 201: returned on success, even if some of the infractions were skipped
+    - 400: if the request body is not a list of at most 1000 items
+
     ### PATCH /bot/infractions/<id:int>
     Update the infraction with the given `id` and return the updated infraction.
     Only `active`, `reason`, and `expires_at` may be updated.
@@ -154,6 +242,9 @@ class InfractionViewSet(
     serializer_class = InfractionSerializer
     queryset = Infraction.objects.all()
     pagination_class = LimitOffsetPaginationExtended
+    # Covered by `infraction_inserted_at_idx`, and by `infraction_actor_inserted_idx`
+    # when filtering by actor.
+    cursor_ordering = ('-inserted_at', '-id')
     filter_backends = (DjangoFilterBackend, SearchFilter, OrderingFilter)
     filterset_fields = ('user__id', 'actor__id', 'active', 'hidden', 'type')
     search_fields = ('$reason',)
@@ -177,7 +268,7 @@ class InfractionViewSet(
         """
         Called to fetch the initial queryset, used to implement some of the more complex filters.
 
-        This provides the `permanent` and the `expires_gte` and `expires_lte` options.
+        This provides the `permanent`, `expires_gte`, `expires_lte` and `reason_search` options.
         """
         filter_permanent = self.request.query_params.get('permanent')
         additional_filters = {}
@@ -237,15 +328,146 @@ class InfractionViewSet(
             additional_filters['type__in'] = [i.strip() for i in filter_types.split(",")]
 
         qs = self.queryset.filter(**additional_filters)
+
+        reason_search = self.request.query_params.get('reason_search')
+        if reason_search:
+            qs = qs.alias(
+                reason_vector=Infraction.reason_search_vector()
+            ).filter(reason_vector=Infraction.reason_search_query(reason_search))
         if self.serializer_class is ExpandedInfractionSerializer:
-            return qs.prefetch_related(
-                'actor',
-                'user',
-                'user__useraltrelationship_set__target__useraltrelationship_set',
-            )
+            return ExpandedInfractionSerializer.expand_queryset(qs)
 
         return qs
 
+    @action(detail=False, methods=['POST'], url_path='bulk', url_name='bulk')
+    def bulk_create(self, request: HttpRequest) -> Response:
+        """Create the valid infractions among the given ones and report the invalid ones."""
+        if not isinstance(request.data, list) or len(request.data) > BULK_CREATE_MAX_INFRACTIONS:
+            raise ValidationError({
+                'non_field_errors': [
+                    f'Expected a list of at most {BULK_CREATE_MAX_INFRACTIONS} infractions.'
+                ]
+            })
+
+        errors = {}
+        valid = {}
+        for index, data in enumerate(request.data):
+            serializer = InfractionBulkItemSerializer(data=data)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                errors[index] = serializer.errors
+
+        user_ids = {data[field] for data in valid.values() for field in ('user', 'actor')}
+        known_user_ids = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        for index, data in list(valid.items()):
+            unknown = {
+                field: [f'Invalid pk "{data[field]}" - object does not exist.']
+                for field in ('user', 'actor') if data[field] not in known_user_ids
+            }
+            if unknown:
+                errors[index] = unknown
+                del valid[index]
+
+        validation_errors = dict(errors)
+        try:
+            infractions = self._insert_infractions(valid, errors)
+        except IntegrityError:
+            # An active infraction conflicting with one of the given ones was created
+            # concurrently. It is taken into account when checking again.
+            errors = dict(validation_errors)
+            try:
+                infractions = self._insert_infractions(valid, errors)
+            except IntegrityError:
+                # Another conflicting infraction was created concurrently, or one of
+                # the users was deleted after being looked up.
+                raise ValidationError({
+                    'non_field_errors': [
+                        'The infractions conflict with concurrent changes, please try again.'
+                    ]
+                })
+
+        return Response(
+            {
+                'created': InfractionSerializer(infractions.values(), many=True).data,
+                'errors': dict(sorted(errors.items())),
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @staticmethod
+    def _insert_infractions(valid: dict[int, dict], errors: dict[int, dict]) -> dict[int, Infraction]:
+        """
+        Insert the given validated infractions, keyed by their index in the request.
+
+        Infractions conflicting with an active infraction of the same type for the same user,
+        including earlier ones in the same request, are added to `errors` instead.
+        """
+        active_infractions = set(
+            Infraction.objects.filter(
+                active=True, user_id__in={data['user'] for data in valid.values()}
+            ).values_list('user_id', 'type')
+        )
+        infractions = {}
+        for index, data in valid.items():
+            if data.get('active'):
+                if (data['user'], data['type']) in active_infractions:
+                    errors[index] = {
+                        'non_field_errors': ['The fields user, type must make a unique set.']
+                    }
+                    continue
+                active_infractions.add((data['user'], data['type']))
+
+            fields = {key: value for key, value in data.items() if key not in ('user', 'actor')}
+            infractions[index] = Infraction(user_id=data['user'], actor_id=data['actor'], **fields)
+
+        with transaction.atomic():
+            Infraction.objects.bulk_create(infractions.values())
+        return infractions
+
+    def _get_expiry_queue_limit(self) -> int:
+        """Get the number of infractions to handle in an expiry queue request."""
+        limit = self.request.query_params.get('limit')
+        if limit is None:
+            return EXPIRY_QUEUE_DEFAULT_LIMIT
+
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= EXPIRY_QUEUE_MAX_LIMIT:
+            raise ValidationError({
+                'limit': [f'must be an integer between 1 and {EXPIRY_QUEUE_MAX_LIMIT}']
+            })
+        return limit
+
+    @action(detail=False)
+    def expiring(self, request: HttpRequest) -> Response:
+        """Return the active infractions which are due to expire next."""
+        limit = self._get_expiry_queue_limit()
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            active=True, expires_at__isnull=False
+        )
+
+        after = request.query_params.get('after')
+        if after:
+            try:
+                after_parsed = datetime.datetime.fromisoformat(after)
+            except ValueError:
+                raise ValidationError({'after': ['failed to convert to datetime']})
+            if after_parsed.tzinfo is None:
+                after_parsed = after_parsed.replace(tzinfo=datetime.UTC)
+            queryset = queryset.filter(expires_at__gt=after_parsed)
+
+        infractions = queryset.order_by('expires_at', 'id')[:limit]
+        return Response(self.get_serializer(infractions, many=True).data)
+
+    @action(detail=False, methods=['POST'])
+    def expire(self, request: HttpRequest) -> Response:
+        """Deactivate expired infractions and return them."""
+        infractions = Infraction.deactivate_expired(self._get_expiry_queue_limit())
+        return Response(self.get_serializer(infractions, many=True).data)
+
     @action(url_path='expanded', detail=False)
     def list_expanded(self, *args, **kwargs) -> Response:
         """
@@ -1,33 +1,103 @@
+import json
 from collections import ChainMap, OrderedDict
+from datetime import UTC, datetime, timedelta
+from itertools import permutations
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import IntegrityError, transaction
-from django.db.models import Q
+from django.db.models import F, Q, QuerySet
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import fields, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import ParseError
+from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
 from pydis_site.apps.api.models.bot.infraction import Infraction
 from pydis_site.apps.api.models.bot.metricity import Metricity, NotFoundError
+from pydis_site.apps.api.models.bot.metricity_activity import MetricityActivityCheckpoint
 from pydis_site.apps.api.models.bot.user import User, UserAltRelationship
+from pydis_site.apps.api.renderers import NDJSONRenderer
 from pydis_site.apps.api.serializers import (
     UserSerializer,
+    UserAltLinkSerializer,
     UserAltRelationshipSerializer,
     UserWithAltsSerializer
 )
 
+# Number of rows fetched from the database at once when exporting users.
+EXPORT_CHUNK_SIZE = 2000
+
+# Supported sizes of the buckets of message activity histograms.
+HISTOGRAM_BUCKET_SIZES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+# Maximum number of buckets a single message activity histogram may span.
+MAX_HISTOGRAM_BUCKETS = 1000
+
 
 class UserListPagination(PageNumberPagination):
-    """Custom pagination class for the User Model."""
+    """
+    Custom pagination class for the User Model.
+
+    By default, this paginates by page number. If the `after` query parameter
+    is given, keyset pagination on the user ID is used instead, which skips
+    counting the table and scanning past previous pages.
+    """
 
     page_size = 2500
     page_size_query_param = "page_size"
+    after_query_param = "after"
+    limit_query_param = "limit"
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: APIView | None = None) -> list:
+        """Paginate by user ID if `after` was given, otherwise by page number."""
+        self.after = None
+        if self.after_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.after = self.get_after(request)
+        limit = self.get_limit(request)
+
+        # Fetch one more row than requested to find out whether there's a next page.
+        users = list(queryset.filter(id__gt=self.after).order_by("id")[:limit + 1])
+        self.has_next = len(users) > limit
+        return users[:limit]
+
+    def get_after(self, request: Request) -> int:
+        """Get the user ID after which to start the page, or -1 to start from the beginning."""
+        after = request.query_params[self.after_query_param]
+        if not after:
+            return -1
+
+        try:
+            return int(after)
+        except ValueError:
+            raise ParseError(detail={
+                self.after_query_param: ["This query parameter must be an integer."]
+            })
+
+    def get_limit(self, request: Request) -> int:
+        """Get the number of users to return in a keyset paginated page."""
+        if self.limit_query_param not in request.query_params:
+            return self.page_size
+
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except ValueError:
+            limit = 0
+
+        if limit <= 0:
+            raise ParseError(detail={
+                self.limit_query_param: ["This query parameter must be a positive integer."]
+            })
+        return min(limit, self.page_size)
 
     def get_next_page_number(self) -> int | None:
         """Get the next page number."""
@@ -46,6 +116,12 @@ class UserListPagination(PageNumberPagination):
 
     def get_paginated_response(self, data: list) -> Response:
         """Override method to send modified response."""
+        if self.after is not None:
+            return Response(OrderedDict([
+                ('next_after', data[-1]['id'] if self.has_next else None),
+                ('results', data)
+            ]))
+
         return Response(OrderedDict([
             ('count', self.page.paginator.count),
             ('next_page_no', self.get_next_page_number()),
@@ -90,9 +166,58 @@ class UserViewSet(ModelViewSet):
     - discriminator: discriminator to search for
     - page_size: number of Users in one page, defaults to 10,000
     - page: page number
+    - after: ID of the last user of the previous page, switches to keyset pagination (see below)
+    - limit: number of Users in one keyset paginated page, defaults to and is capped at 2,500
+    - changed_since: ISO 8601 timestamp, only return users created or updated at or after it
+
+    #### Delta sync
+    Every write to a user records the time of the change, so consumers can pass
+    `changed_since` to fetch only the users that changed since their last sync.
+    Pass the time at which the previous sync started, not when it ended, to
+    avoid missing users that were changed while it was running.
+
+    #### Keyset pagination
+    If the `after` query parameter is given, users are paginated by ID instead of
+    by page number. Only users with an ID greater than `after` are returned, and
+    the total count is not computed, so fetching a page costs the same regardless
+    of how deep into the user table it is. Pass an empty `after` to start from the
+    first user, then pass the `next_after` value of each response to get the next
+    page until it is `None`.
+
+    >>> {
+    ...     'next_after': 409107086526644234,
+    ...     'results': [
+    ...         # Same format as above.
+    ...     ]
+    ... }
 
     #### Status codes
     - 200: returned on success
+    - 400: if `after` or `limit` are not valid integers
+    - 400: if `changed_since` is not a valid timestamp
+
+    ### GET /bot/users/export
+    Streams all users currently known as newline-delimited JSON
+    (`application/x-ndjson`), one user per line, ordered by ID.
+    Rows are written out as they are read from the database, so this is
+    preferable over paginating through `GET /bot/users` for full syncs.
+
+    #### Response format
+    ```
+    {"id": 409107086526644234, "name": "python", "display_name": "Python", ...}
+    {"id": 493839819168808962, "name": "pydis", "display_name": "PyDis", ...}
+    ```
+    Each line has the same format as a single entry in `GET /bot/users`.
+
+    #### Optional Query Parameters
+    - username: username to search for
+    - display_name: display name to search for
+    - discriminator: discriminator to search for
+    - changed_since: ISO 8601 timestamp, only export users created or updated at or after it
+
+    #### Status codes
+    - 200: returned on success
+    - 400: if `changed_since` is not a valid timestamp
 
     ### GET /bot/users/<snowflake:int>
     Gets a single user by ID.
@@ -129,6 +254,11 @@ class UserViewSet(ModelViewSet):
 
     ### GET /bot/users/<snowflake:int>/metricity_data
     Gets metricity data for a single user by ID.
+    Once the `rollup_metricity_activity` management command has been run, message
+    and activity block counts are taken from the rolled up totals, and only messages
+    sent since the last roll up are counted in metricity. Otherwise, they are counted
+    over all of the user's messages and cached for `METRICITY_CACHE_TTL` seconds
+    (5 minutes by default), so they may lag slightly behind.
 
     #### Response format
     >>> {
@@ -181,6 +311,72 @@ class UserViewSet(ModelViewSet):
     - 200: returned on success
     - 400: if request body or query parameters were missing or invalid
 
+    ### POST /bot/users/metricity_activity_histogram
+    Returns the number of messages sent by each of the given users per hour or
+    per day in a given period, using a single query. The response is columnar:
+    `buckets` holds the start of each bucket, and `counts` maps each user ID to
+    a list of message counts with one entry per bucket.
+
+    #### Required Query Parameters
+    - start: the ISO 8601 timestamp to start counting messages from. It is
+      rounded down to the start of its bucket.
+
+    #### Optional Query Parameters
+    - end: the ISO 8601 timestamp up to which (exclusive) messages are
+      counted, defaults to now.
+    - bucket: the size of each bucket, either `hour` or `day` (default).
+
+    Timestamps without a timezone are interpreted as UTC. A histogram may span
+    at most 1000 buckets.
+
+    #### Request Format
+    >>> [
+    ...     409107086526644234,
+    ...     493839819168808962
+    ... ]
+
+    #### Response format
+    >>> {
+    ...     "bucket": "day",
+    ...     "buckets": ["2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z"],
+    ...     "counts": {
+    ...         "409107086526644234": [54, 12],
+    ...         "493839819168808962": [0, 0]
+    ...     }
+    ... }
+
+    #### Status codes
+    - 200: returned on success
+    - 400: if request body or query parameters were missing or invalid
+
+    ### POST /bot/users/metricity_bulk_data
+    Gets metricity data for multiple users by ID at once, using a fixed number
+    of queries regardless of how many users are requested.
+    Users which are not known to metricity are omitted from the response.
+
+    #### Request Format
+    >>> [
+    ...     409107086526644234,
+    ...     493839819168808962
+    ... ]
+
+    #### Response format
+    >>> {
+    ...     "409107086526644234": {
+    ...         "joined_at": "2020-10-06T21:54:23.540766",
+    ...         "total_messages": 22,
+    ...         "activity_blocks": 5,
+    ...         "top_channel_activity": [['off-topic', 15],
+    ...                                  ['talent-pool', 4],
+    ...                                  ['defcon', 2]],
+    ...         "voice_gate_blocked": False
+    ...     }
+    ... }
+
+    #### Status codes
+    - 200: returned on success
+    - 400: if the request body was missing or invalid
+
     ### POST /bot/users
     Adds a single or multiple new users.
     The roles attached to the user(s) must be roles known by the site.
@@ -295,6 +491,51 @@ class UserViewSet(ModelViewSet):
     - 400: if the user in the request body was not found as an alt account
     - 404: if the user with the given `snowflake` could not be found
 
+    ### POST /bot/users/link_alts
+    Link all of the given users to each other as alternate accounts in a single
+    transaction. Users will be linked symmetrically. Relationships which have
+    already been established are left untouched. At most 50 users may be linked
+    at once.
+
+    #### Request body
+    >>> {
+    ...     # The accounts to associate with each other.
+    ...     'users': List[int],
+    ...     # A description for why these relationships were established.
+    ...     'context': str,
+    ...     # The moderator that associated the accounts together.
+    ...     'actor': int
+    ... }
+
+    #### Status codes
+    - 204: returned on success
+    - 400: if the request body was invalid, including if one of the users
+      could not be found in the database
+
+    ### GET /bot/users/<snowflake:int>/alt_cluster
+    Return all users which are transitively linked to the given user as
+    alternate accounts, along with the relationships between them. Each
+    relationship is only included once, with the lower user ID as the source.
+
+    #### Response format
+    >>> {
+    ...     'id': 409107086526644234,
+    ...     'cluster': [493839819168808962, 527000000000000000],
+    ...     'relationships': [
+    ...         {
+    ...             'source': 409107086526644234,
+    ...             'target': 493839819168808962,
+    ...             'actor': 331009347592519680,
+    ...             'context': "Same person, confirmed in DMs."
+    ...         },
+    ...         ...
+    ...     ]
+    ... }
+
+    #### Status codes
+    - 200: returned on success
+    - 404: if the user with the given `snowflake` could not be found
+
     ### BULK PATCH /bot/users/bulk_patch
     Update users with the given `ids` and `details`. `id` field and at least
     one other field is mandatory. Note that editing the `'alts'` field is not
@@ -326,6 +567,36 @@ class UserViewSet(ModelViewSet):
     - 400: if multiple user objects with the same id are given
     - 404: if the user with the given id does not exist
 
+    ### POST /bot/users/bulk_upsert
+    Create the given users, and update the ones which already exist, in a
+    single transaction. The roles of all users are validated at once. Fields
+    which are not given for an existing user keep their current value.
+
+    #### Request body
+    >>> [
+    ...     {
+    ...         'id': int,
+    ...         'name': str,
+    ...         'display_name': str,
+    ...         'discriminator': int,
+    ...         'roles': List[int],
+    ...         'in_guild': bool
+    ...     },
+    ...     ...
+    ... ]
+
+    #### Response format
+    >>> {
+    ...     'inserted': 2,
+    ...     'updated': 5,
+    ...     'unchanged': 49011
+    ... }
+
+    #### Status codes
+    - 200: returned on success
+    - 400: if the request body was invalid, see response body for details
+    - 400: if multiple user objects with the same id are given
+
     ### DELETE /bot/users/<snowflake:int>
     Deletes the user with the given `snowflake`.
 
@@ -340,6 +611,14 @@ class UserViewSet(ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = ('name', 'discriminator', 'display_name')
 
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Apply the `changed_since` filter in addition to the filter backends."""
+        queryset = super().filter_queryset(queryset)
+        changed_since = self._get_timestamp_query_param(self.request, "changed_since")
+        if changed_since is not None:
+            queryset = queryset.filter(updated_at__gte=changed_since)
+        return queryset
+
     def get_serializer(self, *args, **kwargs) -> ModelSerializer:
         """Customize serializers used based on the requested action."""
         if isinstance(kwargs.get('data', {}), list):
@@ -367,6 +646,27 @@ class UserViewSet(ModelViewSet):
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["POST"])
+    def bulk_upsert(self, request: Request) -> Response:
+        """Create or update multiple User objects in a single request."""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        counts = serializer.upsert()
+
+        return Response(counts, status=status.HTTP_200_OK)
+
+    @action(detail=False, renderer_classes=(NDJSONRenderer,))
+    def export(self, request: Request) -> StreamingHttpResponse:
+        """Stream all users as newline-delimited JSON."""
+        users = self.filter_queryset(self.get_queryset()).values(*UserSerializer.Meta.fields)
+        # `iterator` uses a server-side cursor, so only one chunk of rows
+        # is held in memory at any time.
+        lines = (
+            json.dumps(user) + "\n"
+            for user in users.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return StreamingHttpResponse(lines, content_type=NDJSONRenderer.media_type)
+
     @action(detail=True, methods=['POST'], name="Add alternate account",
             url_name='alts', url_path='alts')
     def add_alt(self, request: Request, pk: str) -> Response:
@@ -466,6 +766,92 @@ class UserViewSet(ModelViewSet):
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['POST'], name="Link alternate accounts")
+    def link_alts(self, request: Request) -> Response:
+        """Associate all of the given accounts with each other as alternate accounts."""
+        serializer = UserAltLinkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data['users']
+        actor_id = serializer.validated_data['actor']
+
+        with transaction.atomic():
+            # Lock the referenced users to prevent them from being deleted before the commit.
+            existing_ids = set(
+                User.objects
+                .filter(id__in=[*user_ids, actor_id])
+                .select_for_update(no_key=True)
+                .values_list('id', flat=True)
+            )
+            errors = {}
+            unknown_user_ids = sorted(set(user_ids) - existing_ids)
+            if unknown_user_ids:
+                errors['users'] = [
+                    f"User with ID {user_id} does not exist" for user_id in unknown_user_ids
+                ]
+            if actor_id not in existing_ids:
+                errors['actor'] = [f"User with ID {actor_id} does not exist"]
+            if errors:
+                raise ValidationError(errors)
+
+            UserAltRelationship.objects.bulk_create(
+                (
+                    UserAltRelationship(
+                        source_id=source_id,
+                        target_id=target_id,
+                        actor_id=actor_id,
+                        context=serializer.validated_data['context'],
+                    )
+                    for source_id, target_id in permutations(user_ids, 2)
+                ),
+                ignore_conflicts=True,
+            )
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True)
+    def alt_cluster(self, request: Request, pk: str) -> Response:
+        """Return the transitive cluster of alternate accounts of the user."""
+        user = self.get_object()
+        cluster = user.alt_cluster()
+        relationships = (
+            UserAltRelationship.objects
+            .filter(source_id__in=[user.id, *cluster], source_id__lt=F('target_id'))
+            .order_by('source_id', 'target_id')
+            .values('source', 'target', 'actor', 'context')
+        )
+        return Response({
+            'id': user.id,
+            'cluster': cluster,
+            'relationships': list(relationships),
+        })
+
+    @staticmethod
+    def _get_user_activity(metricity: Metricity, user_id: int) -> dict:
+        """
+        Get the join date, total number of messages and activity blocks of the given user.
+
+        If message activity has been rolled up by the `rollup_metricity_activity` command,
+        only the messages sent since the last roll up are queried from metricity. Roll ups
+        lag a week behind, so that deleted spam is excluded from the recent messages.
+        """
+        checkpoint, rollup = MetricityActivityCheckpoint.get_with_activity(user_id)
+        if checkpoint is None:
+            return metricity.user_activity(user_id)
+
+        recent_activity = metricity.user_activity_since(user_id, checkpoint.processed_until)
+        if recent_activity['total_messages']:
+            rollup.add(
+                recent_activity['total_messages'],
+                recent_activity['activity_blocks'],
+                recent_activity['first_block'],
+                recent_activity['last_block'],
+            )
+        return {
+            'joined_at': recent_activity['joined_at'],
+            'total_messages': rollup.total_messages,
+            'activity_blocks': rollup.activity_blocks,
+        }
+
     @action(detail=True)
     def metricity_data(self, request: Request, pk: str | None = None) -> Response:
         """Request handler for metricity_data endpoint."""
@@ -478,12 +864,10 @@ class UserViewSet(ModelViewSet):
 
         with Metricity() as metricity:
             try:
-                data = metricity.user(user.id)
-
-                data["total_messages"] = metricity.total_messages(user.id)
-                data["activity_blocks"] = metricity.total_message_blocks(user.id)
-
-                data["voice_gate_blocked"] = has_voice_infraction
+                data = {
+                    **self._get_user_activity(metricity, user.id),
+                    "voice_gate_blocked": has_voice_infraction,
+                }
                 return Response(data, status=status.HTTP_200_OK)
             except NotFoundError:
                 return Response(dict(detail="User not found in metricity"),
@@ -496,9 +880,12 @@ class UserViewSet(ModelViewSet):
 
         with Metricity() as metricity:
             try:
-                data = metricity.user(user.id)
-                data["total_messages"] = metricity.total_messages(user.id)
-                data["top_channel_activity"] = metricity.top_channel_activity(user.id)
+                activity = self._get_user_activity(metricity, user.id)
+                data = {
+                    "joined_at": activity["joined_at"],
+                    "total_messages": activity["total_messages"],
+                    "top_channel_activity": metricity.top_channel_activity(user.id),
+                }
                 return Response(data, status=status.HTTP_200_OK)
             except NotFoundError:
                 return Response(dict(detail="User not found in metricity"),
@@ -534,3 +921,116 @@ class UserViewSet(ModelViewSet):
         default_data = dict.fromkeys(user_ids, 0)
         response_data = default_data | dict(data)
         return Response(response_data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _get_timestamp_query_param(request: Request, name: str) -> datetime | None:
+        """Parse the timestamp in the query parameter `name` as an aware datetime, if given."""
+        if name not in request.query_params:
+            return None
+
+        try:
+            timestamp = datetime.fromisoformat(request.query_params[name])
+        except ValueError:
+            raise ParseError(detail={
+                name: ["This query parameter must be an ISO 8601 timestamp."]
+            })
+
+        if timestamp.tzinfo is None:
+            return timestamp.replace(tzinfo=UTC)
+        return timestamp.astimezone(UTC)
+
+    @action(detail=False, methods=["POST"])
+    def metricity_activity_histogram(self, request: Request) -> Response:
+        """Request handler for metricity_activity_histogram endpoint."""
+        bucket = request.query_params.get("bucket", "day")
+        if bucket not in HISTOGRAM_BUCKET_SIZES:
+            raise ParseError(detail={
+                "bucket": [f"This query parameter must be one of {', '.join(HISTOGRAM_BUCKET_SIZES)}."]
+            })
+        bucket_size = HISTOGRAM_BUCKET_SIZES[bucket]
+
+        start = self._get_timestamp_query_param(request, "start")
+        if start is None:
+            raise ParseError(detail={
+                "start": ["This query parameter is required."]
+            })
+        end = self._get_timestamp_query_param(request, "end") or datetime.now(tz=UTC)
+
+        # Align the histogram to the buckets `date_trunc` produces.
+        start = start.replace(minute=0, second=0, microsecond=0)
+        if bucket == "day":
+            start = start.replace(hour=0)
+
+        if end <= start:
+            raise ParseError(detail={
+                "end": ["This query parameter must be after the start of the histogram."]
+            })
+        bucket_count = -((start - end) // bucket_size)
+        if bucket_count > MAX_HISTOGRAM_BUCKETS:
+            raise ParseError(detail={
+                "end": [f"The histogram may span at most {MAX_HISTOGRAM_BUCKETS} buckets."]
+            })
+
+        user_id_list_validator = fields.ListField(
+            child=fields.IntegerField(min_value=0),
+            allow_empty=False
+        )
+        user_ids = [
+            str(user_id) for user_id in
+            user_id_list_validator.run_validation(request.data)
+        ]
+
+        with Metricity() as metricity:
+            data = metricity.message_histogram(user_ids, bucket, start, end)
+
+        counts = {user_id: [0] * bucket_count for user_id in user_ids}
+        for user_id, bucket_start, message_count in data:
+            index = (bucket_start.replace(tzinfo=UTC) - start) // bucket_size
+            counts[user_id][index] = message_count
+
+        return Response({
+            "bucket": bucket,
+            "buckets": [start + bucket_size * index for index in range(bucket_count)],
+            "counts": counts,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["POST"])
+    def metricity_bulk_data(self, request: Request) -> Response:
+        """Request handler for metricity_bulk_data endpoint."""
+        user_id_list_validator = fields.ListField(
+            child=fields.IntegerField(min_value=0),
+            allow_empty=False
+        )
+        user_ids = [
+            str(user_id) for user_id in
+            user_id_list_validator.run_validation(request.data)
+        ]
+
+        voice_blocked_user_ids = {
+            str(user_id) for user_id in Infraction.objects.filter(
+                Q(user__id__in=user_ids, active=True),
+                Q(type="voice_ban") | Q(type="voice_mute")
+            ).values_list("user__id", flat=True)
+        }
+
+        with Metricity() as metricity:
+            data = {
+                user_id: {
+                    "joined_at": joined_at,
+                    "total_messages": 0,
+                    "activity_blocks": 0,
+                    "top_channel_activity": [],
+                    "voice_gate_blocked": user_id in voice_blocked_user_ids,
+                }
+                for user_id, joined_at in metricity.users(user_ids)
+            }
+            known_user_ids = list(data)
+
+            for user_id, total_messages in metricity.total_messages_for_users(known_user_ids):
+                data[user_id]["total_messages"] = total_messages
+            for user_id, blocks in metricity.total_message_blocks_for_users(known_user_ids):
+                data[user_id]["activity_blocks"] = blocks
+            for user_id, channel, count in metricity.top_channel_activity_for_users(known_user_ids):
+                data[user_id]["top_channel_activity"].append((channel, count))
+
+        return Response(data, status=status.HTTP_200_OK)
@@ -5,3 +5,7 @@ class ContentConfig(AppConfig):
     """Django AppConfig for content app."""
 
     name = 'pydis_site.apps.content'
+
+    def ready(self) -> None:
+        """Connect the signal handlers once the registry is fully populated."""
+        import pydis_site.apps.content.signals  # noqa: F401
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from pydis_site.apps.content import utils
+
+
+class Command(BaseCommand):
+    """
+    Fetch the tags from GitHub in the background of the site.
+
+    This is meant to be run periodically. Requests are served the previously fetched
+    tags until this has fetched them again, and a warning is logged once they get older
+    than `TAG_MAX_AGE`.
+    """
+
+    help = (
+        "Fetch the tags from the python-discord/bot repository "
+        "if they were last fetched more than an hour ago."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the option to fetch the tags even if they are not stale."""
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Fetch the tags even if they were fetched recently.",
+        )
+
+    def handle(self, *args, force: bool, **options) -> None:
+        """Fetch and record the tags if they are stale."""
+        if not force and not utils.tags_are_stale():
+            self.stdout.write("Tags are up to date.")
+            return
+
+        try:
+            tags = utils.sync_tags()
+        except utils.TagUpdateError as error:
+            raise CommandError(f"{error} The previously fetched tags are kept.") from error
+
+        self.stdout.write(f"Synced {len(tags)} tags.")
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from pydis_site.apps.content.models import Tag
+from pydis_site.apps.content.utils import invalidate_tag_index
+
+
+@receiver(signal=post_save, sender=Tag)
+@receiver(signal=post_delete, sender=Tag)
+def invalidate_tag_index_on_change(sender: Tag, instance: Tag, **kwargs) -> None:
+    """Drop the tag index of this process when a tag (instance) is saved or deleted."""
+    invalidate_tag_index()
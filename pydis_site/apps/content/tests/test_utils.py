@@ -2,14 +2,16 @@ import datetime
 import json
 import tarfile
 import textwrap
-from io import BytesIO
+from io import BytesIO, StringIO
 from pathlib import Path
 from unittest import mock
 
 import httpx
 import markdown
+from django.core.management import CommandError, call_command
 from django.http import Http404
 from django.test import TestCase
+from django.utils import timezone
 
 from pydis_site import settings
 from pydis_site.apps.content import models, utils
@@ -119,6 +121,20 @@ class GetPageTests(MockPagesTestCase):
         with self.assertRaises(Http404):
             utils.get_page(Path(BASE_PATH, "invalid"))
 
+    def test_get_page_renders_once_until_modified(self):
+        utils._render_page.cache_clear()
+        path = Path(BASE_PATH, "root.md")
+
+        with mock.patch("markdown.Markdown", wraps=markdown.Markdown) as markdown_mock:
+            first = utils.get_page(path)
+            self.assertEqual(first, utils.get_page(path))
+            markdown_mock.assert_called_once()
+
+            path.write_text("# Updated page")
+            html, _ = utils.get_page(path)
+            self.assertEqual(2, markdown_mock.call_count)
+            self.assertIn("Updated page", html)
+
 
 class TagUtilsTests(TestCase):
     """Tests for the tag-related utilities."""
@@ -242,16 +258,38 @@ class TagUtilsTests(TestCase):
             utils.get_tag("fake")
 
     @mock.patch.object(utils, "fetch_tags")
-    def test_get_tags_falls_back_to_stale_cache_on_error(self, fetch_mock: mock.Mock):
-        """Test that stale cached tags are served when refreshing from GitHub fails."""
+    def test_get_tags_serves_stale_tags(self, fetch_mock: mock.Mock):
+        """Test that stale tags are served without refreshing them from GitHub."""
         stale = models.Tag.objects.create(name="stale-tag")
+        models.Tag.objects.update(last_updated=timezone.now() - 2 * utils.TAG_CACHE_TTL)
+
+        result = utils.get_tags()
+
+        fetch_mock.assert_not_called()
+        self.assertEqual([stale], result)
+
+    @mock.patch.object(utils, "fetch_tags")
+    def test_get_tags_warns_about_outdated_tags(self, fetch_mock: mock.Mock):
+        """Test that tags older than `TAG_MAX_AGE` are served with a warning, without fetching them."""
+        outdated = models.Tag.objects.create(name="old-tag")
         models.Tag.objects.update(last_updated=_time)
-        fetch_mock.side_effect = httpx.ReadTimeout("The read operation timed out")
+
+        with self.assertLogs(utils.log, "WARNING"):
+            result = utils.get_tags()
+
+        fetch_mock.assert_not_called()
+        self.assertEqual([outdated], result)
+
+    @mock.patch.object(utils, "fetch_tags")
+    def test_get_tags_fetches_without_recorded_tags(self, fetch_mock: mock.Mock):
+        """Test that tags are fetched from GitHub if none have been recorded yet."""
+        fetch_mock.return_value = [models.Tag(name="new-tag", body="body", sha="123")]
 
         result = utils.get_tags()
 
         fetch_mock.assert_called_once()
-        self.assertEqual([stale], result)
+        self.assertEqual(fetch_mock.return_value, result)
+        self.assertTrue(models.Tag.objects.filter(name="new-tag").exists())
 
     @mock.patch.object(utils, "fetch_tags")
     def test_get_tags_reraises_on_error_with_empty_cache(self, fetch_mock: mock.Mock):
@@ -408,3 +446,58 @@ class TagUtilsTests(TestCase):
 
         with self.assertRaises(models.Tag.DoesNotExist):
             tag.refresh_from_db()
+
+    @mock.patch.object(utils, "fetch_tags")
+    def test_sync_tags_command(self, fetch_mock: mock.Mock):
+        """Test that the command only fetches stale tags, unless forced to."""
+        fetch_mock.return_value = [models.Tag(name="tag-name", body="new body", sha="456")]
+        tag = models.Tag.objects.create(name="tag-name", body="old body", sha="123")
+
+        call_command("sync_tags", stdout=StringIO())
+        fetch_mock.assert_not_called()
+
+        call_command("sync_tags", force=True, stdout=StringIO())
+        fetch_mock.assert_called_once()
+        tag.refresh_from_db()
+        self.assertEqual("new body", tag.body)
+
+        models.Tag.objects.update(last_updated=_time)
+        call_command("sync_tags", stdout=StringIO())
+        self.assertEqual(2, fetch_mock.call_count)
+
+    @mock.patch.object(utils, "fetch_tags")
+    def test_sync_tags_command_keeps_tags_on_error(self, fetch_mock: mock.Mock):
+        """Test that failing to fetch the tags keeps the previous ones."""
+        fetch_mock.side_effect = httpx.ReadTimeout("The read operation timed out")
+        models.Tag.objects.create(name="tag-name", body="old body", sha="123")
+
+        with self.assertRaises(CommandError):
+            call_command("sync_tags", force=True, stdout=StringIO())
+
+        self.assertEqual(["tag-name"], list(models.Tag.objects.values_list("name", flat=True)))
+
+    def test_get_tag_uses_index(self):
+        """Test that tags are looked up without queries once the index is built."""
+        tag = models.Tag.objects.create(name="tag-name", last_commit=self.commit)
+        grouped = models.Tag.objects.create(
+            name="grouped-tag", group="group-name", last_commit=self.commit
+        )
+        utils.get_tag("tag-name")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(tag, utils.get_tag("tag-name"))
+            self.assertEqual(grouped, utils.get_tag("group-name/grouped-tag"))
+            self.assertEqual([grouped], utils.get_tag("group-name"))
+            with self.assertRaises(models.Tag.DoesNotExist):
+                utils.get_tag("group-name/tag-name")
+
+    def test_record_tags_invalidates_index(self):
+        """Test that recorded tags are returned by the next lookup."""
+        models.Tag.objects.create(name="tag-name", body="old body", last_commit=self.commit)
+        utils.get_tag("tag-name")
+
+        utils.record_tags([models.Tag(name="new-tag", body="new body", last_commit=self.commit)])
+
+        self.assertEqual("new body", utils.get_tag("new-tag").body)
+        with self.assertRaises(models.Tag.DoesNotExist):
+            utils.get_tag("tag-name")
@@ -13,7 +13,7 @@ from pydis_site.apps.content.tests.helpers import (
     BASE_PATH, MockPagesTestCase, PARSED_CATEGORY_INFO, PARSED_HTML, PARSED_METADATA
 )
 from pydis_site.apps.content.tests.test_utils import TEST_COMMIT_KWARGS
-from pydis_site.apps.content.views import PageOrCategoryView
+from pydis_site.apps.content.views import PageOrCategoryView, TagView
 
 
 def patch_dispatch_attributes(view: PageOrCategoryView, location: str) -> None:
@@ -221,6 +221,23 @@ class TagViewTests(django.test.TestCase):
         self.assertIn("This is the tag body", response.content.decode("utf-8"))
         self.assertTemplateUsed(response, "content/tag.html")
 
+    def test_tag_is_rendered_once_until_changed(self):
+        """Test that rendered tags are reused until a tag changes."""
+        tag = Tag.objects.create(name="example", body="First body", last_commit=self.commit)
+
+        with mock.patch.object(TagView, "_render_tag", wraps=TagView._render_tag) as render_mock:
+            self.client.get("/pages/tags/example/")
+            response = self.client.get("/pages/tags/example/")
+            render_mock.assert_called_once()
+            self.assertIn("First body", response.content.decode("utf-8"))
+
+            tag.body = "Second body"
+            tag.sha = "new-sha"
+            tag.save()
+            response = self.client.get("/pages/tags/example/")
+            self.assertEqual(2, render_mock.call_count)
+            self.assertIn("Second body", response.content.decode("utf-8"))
+
     def test_invalid_tag_404(self):
         """Test that a tag which doesn't exist raises a 404."""
         with mock.patch("pydis_site.apps.content.utils.fetch_tags", autospec=True):
@@ -3,6 +3,8 @@ import functools
 import json
 import logging
 import tarfile
+from collections import defaultdict
+from dataclasses import dataclass, field
 from http import HTTPStatus
 from io import BytesIO
 from pathlib import Path
@@ -19,7 +21,15 @@ from markdown.extensions.toc import TocExtension
 from pydis_site import settings
 from .models import Commit, Tag
 
+# How long tags are used before `sync_tags` fetches them from GitHub again.
 TAG_CACHE_TTL = datetime.timedelta(hours=1)
+# How old tags may get before a warning is logged that `sync_tags` has stopped running.
+TAG_MAX_AGE = 6 * TAG_CACHE_TTL
+# How long a process uses its tag index before reading the tags from the database again,
+# to pick up tags synced by other processes.
+TAG_INDEX_TTL = datetime.timedelta(minutes=5)
+# Number of rendered content pages kept in memory by `get_page`.
+PAGE_CACHE_SIZE = 256
 log = logging.getLogger(__name__)
 
 
@@ -27,6 +37,38 @@ class TagUpdateError(Exception):
     """Raised when tags cannot be fetched from GitHub and no cached data is available."""
 
 
+@dataclass(frozen=True)
+class TagIndex:
+    """All tags visible to the application, indexed for lookups by `get_tag`."""
+
+    tags: list[Tag]
+    by_location: dict[tuple[str | None, str], Tag]
+    by_group: dict[str, list[Tag]]
+    refresh_at: datetime.datetime
+    # Rendered tag pages, keyed by the group, name and hash of the tag. Links to other
+    # tags in a tag's body depend on the indexed tags, so these live as long as the index.
+    rendered: dict[tuple[str | None, str, str], tuple[str | None, str]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, tags: list[Tag]) -> "TagIndex":
+        """Index the given tags, to be used for `TAG_INDEX_TTL`."""
+        by_group = defaultdict(list)
+        for tag in tags:
+            if tag.group is not None:
+                by_group[tag.group].append(tag)
+
+        return cls(
+            tags=tags,
+            by_location={(tag.group, tag.name): tag for tag in reversed(tags)},
+            by_group=dict(by_group),
+            refresh_at=timezone.now() + TAG_INDEX_TTL,
+        )
+
+
+# The index of the tags used by this process, see `get_tag_index`.
+_tag_index: TagIndex | None = None
+
+
 def github_client(**kwargs) -> httpx.Client:
     """Get a client to access the GitHub API with important settings pre-configured."""
     client = httpx.Client(
@@ -199,6 +241,7 @@ def set_tag_commit(tag: Tag) -> None:
 
 def record_tags(tags: list[Tag]) -> None:
     """Sync the database with an updated set of tags."""
+    invalidate_tag_index()
     with transaction.atomic():
         # Remove any tags that we don't want to keep in the future
         Tag.objects.exclude(name__in=(tag.name for tag in tags)).delete()
@@ -217,36 +260,70 @@ def record_tags(tags: list[Tag]) -> None:
     Commit.objects.filter(tag__isnull=True).delete()
 
 
+def invalidate_tag_index() -> None:
+    """Drop the tag index of this process, to rebuild it on the next lookup."""
+    global _tag_index
+    _tag_index = None
+
+
+def tags_are_stale() -> bool:
+    """Return whether any tag was last fetched from GitHub more than `TAG_CACHE_TTL` ago."""
+    last_update = (
+        Tag.objects.values_list("last_updated", flat=True)
+        .order_by("last_updated").first()
+    )
+    return last_update is None or timezone.now() >= (last_update + TAG_CACHE_TTL)
+
+
+def sync_tags() -> list[Tag]:
+    """Fetch the tags from GitHub, and replace the recorded tags with them."""
+    try:
+        tags = fetch_tags()
+    except httpx.HTTPError as error:
+        raise TagUpdateError("Failed to fetch tags from GitHub.") from error
+
+    record_tags(tags)
+    return tags
+
+
 def get_tags() -> list[Tag]:
-    """Return a list of all tags visible to the application, from the cache or API."""
+    """
+    Return a list of all tags visible to the application.
+
+    Tags are kept up to date by the `sync_tags` management command, and stale tags
+    are returned until it has fetched them again. Tags are only fetched from GitHub
+    here if none have been recorded yet. If they are older than `TAG_MAX_AGE`, a
+    warning is logged instead.
+    """
     if settings.STATIC_BUILD:  # pragma: no cover
-        last_update = None
-    else:
-        last_update = (
-            Tag.objects.values_list("last_updated", flat=True)
-            .order_by("last_updated").first()
+        return get_tags_static()
+
+    tags = list(Tag.objects.all())
+    if not tags:
+        return sync_tags()
+
+    last_update = min(tag.last_updated for tag in tags)
+    if timezone.now() >= last_update + TAG_MAX_AGE:
+        log.warning(
+            "Tags were last synced at %s. Check that the sync_tags command is run periodically.",
+            last_update.isoformat(),
         )
+    return tags
 
-    if last_update is None or timezone.now() >= (last_update + TAG_CACHE_TTL):
-        # Stale or empty cache
-        if settings.STATIC_BUILD:  # pragma: no cover
-            tags = get_tags_static()
-        else:
-            try:
-                tags = fetch_tags()
-            except httpx.HTTPError as error:
-                # return the stale cache if we have one, otherwise raise the error
-                if last_update is not None:
-                    log.warning("Failed to refresh tags from GitHub: %r", error)
-                    return list(Tag.objects.all())
-                raise TagUpdateError(
-                    "Failed to fetch tags from GitHub, also have no stale cache to fall back on."
-                ) from error
-            record_tags(tags)
 
-        return tags
+def get_tag_index() -> TagIndex:
+    """
+    Return the index of all tags visible to the application.
 
-    return list(Tag.objects.all())
+    The index is kept in memory for `TAG_INDEX_TTL`, or until the tags are changed
+    by this process.
+    """
+    global _tag_index
+    index = _tag_index
+    if index is None or timezone.now() >= index.refresh_at:
+        index = TagIndex.build(get_tags())
+        _tag_index = index
+    return index
 
 
 def get_tag(path: str, *, skip_sync: bool = False) -> Tag | list[Tag]:
@@ -268,17 +345,14 @@ def get_tag(path: str, *, skip_sync: bool = False) -> Tag | list[Tag]:
         name = path[0]
         group = None
 
-    matches = []
-    for tag in get_tags():
-        if tag.name == name and tag.group == group:
-            if tag.last_commit is None and not skip_sync:
-                set_tag_commit(tag)
-            return tag
-        elif tag.group == name and group is None:  # noqa: RET505
-            matches.append(tag)
+    index = get_tag_index()
+    if tag := index.by_location.get((group, name)):
+        if tag.last_commit_id is None and not skip_sync:
+            set_tag_commit(tag)
+        return tag
 
-    if matches:
-        return matches
+    if group is None and name in index.by_group:
+        return list(index.by_group[name])
 
     raise Tag.DoesNotExist
 
@@ -344,10 +418,22 @@ def get_category_pages(path: Path) -> dict[str, dict]:
 
 
 def get_page(path: Path) -> tuple[str, dict]:
-    """Get one specific page."""
+    """
+    Get one specific page.
+
+    Rendered pages are kept in memory until the file is modified.
+    """
     if not path.is_file():
         raise Http404("Page not found.")
 
+    stat = path.stat()
+    html, metadata = _render_page(path, stat.st_mtime_ns, stat.st_size)
+    return html, metadata.copy()
+
+
+@functools.lru_cache(maxsize=PAGE_CACHE_SIZE)
+def _render_page(path: Path, mtime_ns: int, size: int) -> tuple[str, dict]:
+    """Render the page at `path`, as of the given modification time and size."""
     metadata, content = frontmatter.parse(path.read_text(encoding="utf-8"))
     toc_depth = metadata.get("toc", 1)
 
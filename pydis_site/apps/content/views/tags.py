@@ -73,6 +73,20 @@ class TagView(TemplateView):
                 "path": f"tags/{tag.group}",
             })
 
+        rendered = utils.get_tag_index().rendered
+        key = (tag.group, tag.name, tag.sha)
+        if key not in rendered:
+            rendered[key] = TagView._render_tag(tag)
+
+        title, context["page"] = rendered[key]
+        if title is not None:
+            context["page_title"] = title
+
+    @staticmethod
+    def _render_tag(tag: Tag) -> tuple[str | None, str]:
+        """Render the body of a tag, and return it with the title of its embed, if any."""
+        title = None
+
         # Clean up tag body
         body = frontmatter.parse(tag.body)
         content = body[1]
@@ -100,12 +114,11 @@ class TagView(TemplateView):
 
         # Add support for some embed elements
         if embed := body[0].get("embed"):
-            context["page_title"] = embed["title"]
+            title = embed["title"]
             if image := embed.get("image"):
                 content = f"![{embed['title']}]({image['url']})\n\n" + content
 
-        # Insert the content
-        context["page"] = markdown.markdown(content, extensions=["pymdownx.superfences"])
+        return title, markdown.markdown(content, extensions=["pymdownx.superfences"])
 
     @staticmethod
     def _set_group_context(context: dict[str, any], tags: list[Tag]) -> None:
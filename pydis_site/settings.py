@@ -33,6 +33,11 @@ env = environ.Env(
     GITHUB_TOKEN=(str, None),
     GITHUB_APP_ID=(str, None),
     GITHUB_APP_KEY=(str, None),
+    METRICITY_CACHE_TTL=(int, 300),
+    DATABASE_POOL=(bool, True),
+    DATABASE_POOL_MIN_SIZE=(int, 2),
+    DATABASE_POOL_MAX_SIZE=(int, 4),
+    DATABASE_POOL_TIMEOUT=(float, 10),
 )
 
 GIT_SHA = env("GIT_SHA")
@@ -193,6 +198,27 @@ DATABASES = {
     'metricity': env.db('METRICITY_DB_URL', engine="django_prometheus.db.backends.postgresql"),
 } if not STATIC_BUILD else {}
 
+# Keep a pool of health-checked connections per database, instead of connecting
+# on every request. The default pool size matches waitress' default thread count.
+if env('DATABASE_POOL'):
+    for database in DATABASES.values():
+        database['CONN_HEALTH_CHECKS'] = True
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': env('DATABASE_POOL_MIN_SIZE'),
+            'max_size': env('DATABASE_POOL_MAX_SIZE'),
+            'timeout': env('DATABASE_POOL_TIMEOUT'),
+        }
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# How long, in seconds, to cache the results of per-user metricity queries
+METRICITY_CACHE_TTL = env('METRICITY_CACHE_TTL')
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 